@@ -2,14 +2,17 @@ import streamlit as st
 import os
 from datetime import datetime, timedelta
 
-from utils.storyblok import fetch_all_stories
-from utils.plausible import get_page_visits_custom_date_range
-from apps.page_language_grouping_app import page_language_grouping_app
-from apps.post_sales_recap_app import post_sales_recap_app
-
-if os.path.exists('style.css'):
-    with open('style.css', 'r', encoding='utf-8') as f:
-        st.markdown("<style>" + f.read() + "</style>", unsafe_allow_html=True)
+@st.cache_resource
+def load_custom_css():
+    """Read style.css once per server process"""
+    if os.path.exists('style.css'):
+        with open('style.css', 'r', encoding='utf-8') as f:
+            return f.read()
+    return ""
+
+custom_css = load_custom_css()
+if custom_css:
+    st.markdown("<style>" + custom_css + "</style>", unsafe_allow_html=True)
 st.markdown("<meta name='noindex' content='noindex'>", unsafe_allow_html=True)
 
 # Configure Streamlit page
@@ -19,25 +22,17 @@ st.set_page_config(
     layout="wide"
 )
 
-APPS_LIST = [
-    "Marketing - Page Language Grouping",
-    "Sales - Post Sales Recap",
-]
-
-# Check URL parameters for direct routing
-query_params = st.query_params
-app_to_open = None
-hs_id = None
-# Check for direct URL routing - support both page parameter and direct URL paths
-if query_params.get("page") == "post-sales-recap" or "post-sales-recap" in str(query_params):
-    app_to_open = "Sales - Post Sales Recap"
-    hs_id = query_params.get("hs_id")
-
-# Reorder APPS_LIST so that app_to_open appears first
-if app_to_open and app_to_open in APPS_LIST:
-    reordered_apps_list = [app_to_open] + [app for app in APPS_LIST if app != app_to_open]
-else:
-    reordered_apps_list = APPS_LIST
+# Check URL parameters for direct routing once per session, the URL does not change between reruns.
+# /post-sales-recap is served by its page directly; ?page=post-sales-recap (or a bare ?post-sales-recap)
+# on the root URL is still honoured by making that page the default
+if "url_route" not in st.session_state:
+    query_params = st.query_params
+    app_to_open = None
+    requested_routes = {query_params.get("page"), *query_params.keys()}
+    if "post-sales-recap" in requested_routes:
+        app_to_open = "post-sales-recap"
+    st.session_state.url_route = (app_to_open, query_params.get("hs_id"))
+app_to_open, hs_id = st.session_state.url_route
 
 # Sidebar navigation
 st.sidebar.title("🛠️ Dashdoc Streamlit Internal Tool")
@@ -54,28 +49,96 @@ st.sidebar.subheader("Authentication")
 username_input = st.sidebar.text_input("Username", value="")
 password_input = st.sidebar.text_input("Password", value="", type="password")
 
-# App selection - use direct route if available, otherwise show selector
-app_selection = st.sidebar.selectbox(
-    "Select Tool",
-    reordered_apps_list
-)
+# Stop unauthenticated reruns before any tool page or data fetch is built
+if ENV != "dev" and (username_input != USERNAME or password_input != PASSWORD):
+    st.error("Invalid username or password")
+    st.stop()
+
+@st.fragment
+def page_language_grouping_fragment():
+    """Date range + analytics subtree, reruns on its own so date changes don't rerun the whole app"""
+    from utils.plausible import get_page_visits_custom_date_range
+    from utils.storyblok import fetch_all_stories
+    from apps.page_language_grouping_app import page_language_grouping_app
+
+    # Default range is fixed for the session so the date_input default stays stable across reruns
+    if "analytics_default_range" not in st.session_state:
+        now = datetime.now()
+        st.session_state.analytics_default_range = (now - timedelta(days=30), now)
+    start_date, end_date = st.date_input("Select date range for analytics", value=st.session_state.analytics_default_range)
+    start_date = start_date.strftime("%Y-%m-%d")
+    end_date = end_date.strftime("%Y-%m-%d")
+    analytics = get_page_visits_custom_date_range(start_date=start_date, end_date=end_date)
+    # Read on every fragment rerun, a cache hit unless the stories were cleared after grouping pages
+    stories = fetch_all_stories(test=DEV_MODE)
+    page_language_grouping_app(stories, analytics, dev_mode=DEV_MODE)
+
+# Tool modules are imported lazily inside each page so a rerun only pays for the selected tool
+# (the sales app builds its OpenAI client and loads HubSpot TMS options at import)
+def page_language_grouping_page():
+    page_language_grouping_fragment()
+
+def post_sales_recap_page():
+    from apps.post_sales_recap_app import post_sales_recap_app
+
+    post_sales_recap_app(dev_mode=DEV_MODE, hs_id=hs_id)
+
+APP_PAGES = [
+    ("Marketing - Page Language Grouping", page_language_grouping_page, "page-language-grouping"),
+    ("Sales - Post Sales Recap", post_sales_recap_page, "post-sales-recap"),
+]
+
+def render_cache_stats():
+    """Dev mode sidebar table of the memory used by each st.cache_data / st.cache_resource function"""
+    import pandas as pd
+
+    with st.sidebar.expander("Cache stats"):
+        # Streamlit internals, not a public API: show the stats as unavailable if a Streamlit upgrade moves them
+        try:
+            from streamlit.runtime.caching import get_data_cache_stats_provider, get_resource_cache_stats_provider
+            from streamlit.runtime.stats import CACHE_MEMORY_FAMILY
+            cache_stats = []
+            for provider in (get_data_cache_stats_provider(), get_resource_cache_stats_provider()):
+                # Older Streamlit versions return the CacheStat list, newer ones group it by metric family
+                stats = provider.get_stats()
+                if isinstance(stats, dict):
+                    stats = stats.get(CACHE_MEMORY_FAMILY, [])
+                cache_stats.extend((stat.category_name.removeprefix("st_"), stat.cache_name, stat.byte_length) for stat in stats)
+        except (ImportError, AttributeError, TypeError):
+            st.caption("Cache stats unavailable in this Streamlit version")
+            return
+        if not cache_stats:
+            st.caption("Nothing cached yet")
+            return
+        stats_df = pd.DataFrame(cache_stats, columns=["Cache", "Function", "Bytes"])
+        stats_df = stats_df.groupby(["Cache", "Function"], as_index=False).agg(Entries=("Bytes", "size"), KB=("Bytes", "sum"))
+        stats_df["KB"] = (stats_df["KB"] / 1024).round(1)
+        st.dataframe(stats_df.sort_values("KB", ascending=False), hide_index=True)
+
+def render_request_timings():
+    """Dev mode sidebar table of the latest Storyblok, Plausible and HubSpot requests of this session"""
+    import pandas as pd
+    from utils.http import get_request_log
+
+    request_log = get_request_log()
+    with st.sidebar.expander("API requests"):
+        if not request_log:
+            st.caption("No request sent yet")
+            return
+        requests_df = pd.DataFrame(list(request_log), columns=["Method", "URL", "Status", "ms"])
+        st.dataframe(requests_df.iloc[::-1], hide_index=True)
 
 # Main app router
 def main():
-    if app_selection == "Marketing - Page Language Grouping":
-        start_date, end_date = st.date_input("Select date range for analytics", value=(datetime.now() - timedelta(days=30), datetime.now()))
-        start_date = start_date.strftime("%Y-%m-%d")
-        end_date = end_date.strftime("%Y-%m-%d")
-        analytics = get_page_visits_custom_date_range(start_date=start_date, end_date=end_date)
-        stories = fetch_all_stories(test=DEV_MODE)
-        page_language_grouping_app(stories, analytics, dev_mode=DEV_MODE)
-    elif app_selection == "Sales - Post Sales Recap":
-        post_sales_recap_app(dev_mode=DEV_MODE, hs_id=hs_id)
+    default_route = app_to_open or APP_PAGES[0][2]
+    pages = [
+        st.Page(page_fn, title=title, url_path=url_path, default=url_path == default_route)
+        for title, page_fn, url_path in APP_PAGES
+    ]
+    st.navigation(pages).run()
+    if DEV_MODE:
+        render_cache_stats()
+        render_request_timings()
+
 if __name__ == "__main__":
-    if ENV == "dev":
-        main()
-    else:
-        if username_input == USERNAME and password_input == PASSWORD:
-            main()
-        else:
-            st.error("Invalid username or password")
+    main()
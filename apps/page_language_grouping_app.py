@@ -1,7 +1,8 @@
 from datetime import timedelta, datetime
+import numpy as np
 import pandas as pd
 import streamlit as st
-from utils.storyblok import group_pages
+from utils.storyblok import group_pages, fetch_all_stories
 from utils.plausible import get_page_visits_custom_date_range
 LOCALE_TO_ICON={
     "en": "🇬🇧",
@@ -10,230 +11,238 @@ LOCALE_TO_ICON={
     "nl": "🇳🇱",
     "es": "🇪🇸"
 }
+LOCALES = list(LOCALE_TO_ICON)
+STORYBLOK_STORY_LINK = "https://app.storyblok.com/#/me/spaces/171339/stories/0/0/"
+ITEMS_PER_PAGE_OPTIONS = [10, 25, 50, 100]
+# Group table sort options, label -> (column, ascending)
+SORT_ORDERS = {
+    "Descending (Most visitors first)": ('Total Visitors', False),
+    "Ascending (Least visitors first)": ('Total Visitors', True),
+    "Descending (Most pageviews first)": ('Total Pageviews', False),
+    "Ascending (Least pageviews first)": ('Total Pageviews', True),
+    "Descending (Most locales first)": ('Available Locales', False),
+    "Ascending (Least locales first)": ('Available Locales', True),
+    "Descending (Most published locales first)": ('Published locales', False),
+    "Ascending (Least published locales first)": ('Published locales', True),
+    "Descending (Most draft locales first)": ('Draft locales', False),
+    "Ascending (Least draft locales first)": ('Draft locales', True),
+}
+# Story field -> page level table column, in display order
+PAGE_VIEW_COLUMNS = {
+    'group_id': 'Group ID',
+    'name': 'Page Name',
+    'id': 'Page ID',
+    'link': 'Page Link',
+    'published': 'Page Published',
+    'content_type': 'Page Content Type',
+    'full_slug': 'Page Slug',
+    'visitors': 'Page Visitors',
+    'pageviews': 'Page Pageviews',
+}
+
+# Story fields used by the group view, in the order of the rows passed to build_locale_stories
+GROUP_VIEW_STORY_FIELDS = ('id', 'name', 'full_slug', 'group_id', 'published', 'content_type', 'visitors', 'pageviews')
 
-def format_numeric_columns(df):
+def build_locale_stories(story_rows, locales):
     """
-    Format numeric columns to display as integers without decimal places
+    Build the per-locale story frame used by the group view
     
     Args:
-        df: pandas DataFrame
+        story_rows: Tuples of story values in GROUP_VIEW_STORY_FIELDS order
+        locales: List of available locales in priority order
     
     Returns:
-        DataFrame with formatted numeric columns
+        Tuple of (group_ids, locale_stories) where group_ids is an Index of every
+        group_id in first-seen order and locale_stories is a DataFrame with one row
+        per group and locale, sorted by locale priority
     """
-    df_formatted = df.copy()
-    
-    # Get all columns that contain visitor or pageview data
-    numeric_columns = []
-    for col in df.columns:
-        if '👤' in col or '🔍' in col or col in ['Total Visitors', 'Total Pageviews']:
-            numeric_columns.append(col)
-    
-    # Convert to int and format to remove decimal places
-    for col in numeric_columns:
-        if col in df_formatted.columns:
-            # Fill NaN values with 0 before converting to int
-            df_formatted[col] = df_formatted[col].fillna(0).astype(int)
-    
-    return df_formatted
+    stories_df = pd.DataFrame.from_records(list(story_rows), columns=GROUP_VIEW_STORY_FIELDS)
+    stories_df = stories_df[stories_df['group_id'].notna() & (stories_df['group_id'] != '')]
+    group_ids = pd.Index(stories_df['group_id'].unique(), name='Group ID')
+    
+    # Locale is the first slug segment (or the whole slug for locale root pages)
+    slug_heads = stories_df['full_slug'].fillna('').str.split('/', n=1).str[0]
+    stories_df = stories_df.assign(locale=slug_heads.where(slug_heads.isin(locales)))
+    # Keep the last story seen for each group/locale pair
+    locale_stories = stories_df.dropna(subset=['locale']).drop_duplicates(['group_id', 'locale'], keep='last')
+    locale_stories = locale_stories.assign(
+        locale=pd.Categorical(locale_stories['locale'], categories=locales, ordered=True),
+        published=locale_stories['published'].fillna(False).astype(bool),
+        content_type=locale_stories['content_type'].fillna('').astype('category'),
+        # Lowercased once here so the page name filter doesn't redo it on every rerun
+        name_lower=locale_stories['name'].fillna('').str.lower(),
+    ).sort_values('locale', kind='stable')
+    
+    return group_ids, locale_stories
 
-def apply_filters(grouped_data, show_published_only, show_draft_only, show_missing_locales, page_name_filter, content_type_filter, locales):
+def build_group_table(group_ids, locale_stories, locales):
     """
-    Apply filters to grouped data with AND logic
+    Aggregate the per-locale stories into one row per group
     
     Args:
-        grouped_data: Dictionary of grouped story data
-        show_published_only: Boolean to filter only published pages
-        show_draft_only: Boolean to filter only groups with draft pages
-        show_missing_locales: Boolean to filter only groups with missing locales
-        page_name_filter: String filter for page name
-        content_type_filter: String filter for content type
+        group_ids: Index of group_ids in display order
+        locale_stories: DataFrame returned by build_locale_stories
         locales: List of available locales
     
     Returns:
-        Filtered dictionary of grouped data
+        DataFrame indexed by group_id holding every column the group table can show
     """
-    filtered_data = grouped_data.copy()
+    by_group = locale_stories.groupby('group_id', sort=False)
+    available = by_group.size()
+    published = by_group['published'].sum()
+    totals = by_group[['visitors', 'pageviews']].sum()
+    # Rows are in locale priority order, so the first row of a group gives its page name
+    page_names = locale_stories.drop_duplicates('group_id').set_index('group_id')['name']
+    content_types = (
+        locale_stories.drop_duplicates(['group_id', 'content_type'])
+        # Joined as plain strings, a categorical result can't be filled with '' for groups without locale pages
+        .astype({'content_type': object})
+        .groupby('group_id', sort=False)['content_type']
+        .agg(', '.join)
+    )
     
-    # Apply published filter
-    if show_published_only:
-        filtered_data = {
-            group_id: data for group_id, data in filtered_data.items()
-            if any(loc_data['published'] for loc_data in data['locales'].values())
-        }
+    link_labels = pd.Series(np.where(locale_stories['published'], "🚀", "📝"), index=locale_stories.index)
+    locale_stories = locale_stories.assign(
+        cell="[" + link_labels + "](" + STORYBLOK_STORY_LINK + locale_stories['id'].astype(str) + ")"
+    )
     
-    # Apply draft filter
-    if show_draft_only:
-        filtered_data = {
-            group_id: data for group_id, data in filtered_data.items()
-            if any(not loc_data['published'] for loc_data in data['locales'].values())
-        }
+    def pivot_locales(values, fill_value):
+        return (
+            locale_stories.pivot(index='group_id', columns='locale', values=values)
+            .reindex(index=group_ids, columns=locales)
+            .fillna(fill_value)
+        )
     
-    # Apply missing locales filter
-    if show_missing_locales:
-        filtered_data = {
-            group_id: data for group_id, data in filtered_data.items()
-            if len(data['locales']) < len(locales)
-        }
-    
-    
-    # Apply page name filter
-    if page_name_filter:
-        filtered_data = {
-            group_id: data for group_id, data in filtered_data.items()
-            if any(
-                page_name_filter.lower() in loc_data.get('story_name', '').lower()
-                for loc_data in data['locales'].values()
-            )
-        }
-    
-    # Apply content type filter
-    if content_type_filter:
-        filtered_data = {
-            group_id: data for group_id, data in filtered_data.items()
-            if any(
-                data['locales'][locale]['raw'].get('content_type') == content_type_filter
-                for locale in data['locales']
-            )
-        }
+    cells = pivot_locales('cell', "❌")
+    locale_visitors = pivot_locales('visitors', 0).astype(int)
+    locale_pageviews = pivot_locales('pageviews', 0).astype(int)
     
-    return filtered_data
+    table = pd.DataFrame(index=group_ids)
+    table['Page Name'] = page_names.reindex(group_ids).fillna('')
+    table['Available Locales'] = available.reindex(group_ids, fill_value=0)
+    table['Published locales'] = published.reindex(group_ids, fill_value=0).astype(int)
+    table['Draft locales'] = table['Available Locales'] - table['Published locales']
+    table['Content Type'] = content_types.reindex(group_ids).fillna('')
+    for locale in locales:
+        icon = LOCALE_TO_ICON[locale]
+        table[icon] = cells[locale].to_numpy()
+        table[f"{icon} 👤"] = locale_visitors[locale].to_numpy()
+        table[f"{icon} 🔍"] = locale_pageviews[locale].to_numpy()
+    table['Total Visitors'] = totals['visitors'].reindex(group_ids, fill_value=0)
+    table['Total Pageviews'] = totals['pageviews'].reindex(group_ids, fill_value=0)
+    return table
 
-def get_page_name(data, locales):
+@st.cache_data(show_spinner=False)
+def build_group_view_data(story_rows, locales):
     """
-    Get the best available page name from locales data
+    Cached grouping step of the group view, only recomputed when the stories change
     
     Args:
-        data: Dictionary containing locales data
-        locales: List of available locales in priority order
+        story_rows: Tuples of story values in GROUP_VIEW_STORY_FIELDS order
+        locales: Tuple of available locales in priority order
     
     Returns:
-        String representing the page name
+        Tuple of (locale_stories, group_table, content_types)
     """
-    for locale in locales:
-        if locale in data['locales']:
-            return data['locales'][locale].get('story_name', '')
-    return ''
+    locales = list(locales)
+    group_ids, locale_stories = build_locale_stories(story_rows, locales)
+    group_table = build_group_table(group_ids, locale_stories, locales)
+    content_type_index = GROUP_VIEW_STORY_FIELDS.index('content_type')
+    group_id_index = GROUP_VIEW_STORY_FIELDS.index('group_id')
+    content_types = [""] + [
+        content_type for content_type in dict.fromkeys(row[content_type_index] for row in story_rows if row[group_id_index])
+        if content_type != ""
+    ]
+    return locale_stories, group_table, content_types
 
-def get_published_locales(data, locales):
+def apply_filters(group_table, locale_stories, show_published_only, show_draft_only, show_missing_locales, page_name_filter, content_type_filter, locales):
     """
-    Args:
-        data: Dictionary containing locales data
-        locales: List of available locales
-    """
-    return len([locale for locale in locales if locale in data['locales'] and data['locales'][locale]['published']])
-
-def get_draft_locales(data, locales):
-    """
-    Get the best available draft locales from locales data
+    Apply filters to the group table with AND logic
     
     Args:
-        data: Dictionary containing locales data
+        group_table: DataFrame returned by build_group_table
+        locale_stories: DataFrame returned by build_locale_stories
+        show_published_only: Boolean to filter only published pages
+        show_draft_only: Boolean to filter only groups with draft pages
+        show_missing_locales: Boolean to filter only groups with missing locales
+        page_name_filter: String filter for page name
+        content_type_filter: String filter for content type
         locales: List of available locales
-    """
-    return len([locale for locale in locales if locale in data['locales'] and not data['locales'][locale]['published']])
-
-def get_content_type(data, locales):
-    """
-    Get the best available content type from locales data
     
-    Args:
-        data: Dictionary containing locales data
-        locales: List of available locales
+    Returns:
+        Filtered group table
     """
-    content_types = []
-    for locale in locales:
-        if locale in data['locales']:
-            ct=data['locales'][locale]["raw"].get('content_type', '')
-            if ct not in content_types:
-                content_types.append(ct)
-    return ', '.join(content_types)
+    mask = np.ones(len(group_table), dtype=bool)
+    
+    if show_published_only:
+        mask &= (group_table['Published locales'] > 0).to_numpy()
+    
+    if show_draft_only:
+        mask &= (group_table['Draft locales'] > 0).to_numpy()
+    
+    if show_missing_locales:
+        mask &= (group_table['Available Locales'] < len(locales)).to_numpy()
+    
+    # Page name / content type match if any locale of the group matches. The cheap count
+    # filters above run first so the string checks only scan stories of remaining groups
+    if page_name_filter or content_type_filter:
+        candidate_stories = locale_stories
+        if not mask.all():
+            candidate_stories = locale_stories[locale_stories['group_id'].isin(group_table.index[mask])]
+        
+        if page_name_filter:
+            name_matches = candidate_stories['name_lower'].str.contains(page_name_filter.lower(), regex=False)
+            mask &= group_table.index.isin(candidate_stories.loc[name_matches, 'group_id'])
+        
+        if content_type_filter:
+            content_type_matches = candidate_stories['content_type'] == content_type_filter
+            mask &= group_table.index.isin(candidate_stories.loc[content_type_matches, 'group_id'])
+    
+    return group_table[mask]
 
-def create_table_data(filtered_data, locales, show_anayltics_on_each_locale, show_group_id):
+def create_table_data(filtered_table, locales, show_anayltics_on_each_locale, show_group_id):
     """
-    Create table data from filtered grouped data
+    Select the displayed columns of the filtered group table
     
     Args:
-        filtered_data: Filtered dictionary of grouped story data
+        filtered_table: Filtered group table
         locales: List of available locales
     
     Returns:
-        List of dictionaries representing table rows
+        DataFrame with one row per group and the columns to display
     """
-    table_data = []
-    for group_id, data in filtered_data.items():
-        # Count available locales
-        available_locales_count = len(data['locales'])
-        row = {}
-        if show_group_id:
-            row = {'Group ID': group_id}
-        row = {
-            **row,
-            'Page Name': get_page_name(data, locales),
-            'Available Locales': available_locales_count,
-            'Published locales': get_published_locales(data, locales),
-            'Draft locales': get_draft_locales(data, locales),
-            'Content Type': get_content_type(data, locales),
-        }
-        
-        total_visitors = 0
-        total_pageviews = 0
-        # Add locale columns
-        for locale in locales:
-            if locale in data['locales']:
-                locale_data = data['locales'][locale]
-                label = "📝"
-                if locale_data['published']:
-                    label = "🚀"
-                row[LOCALE_TO_ICON[locale]] = f"[{label}]({locale_data['link']})"
-                # Handle potential NaN/None values in visitor/pageview data
-                visitors = locale_data.get('visitors', 0) or 0
-                pageviews = locale_data.get('pageviews', 0) or 0
-                if show_anayltics_on_each_locale:
-                    row[f"{LOCALE_TO_ICON[locale]} 👤"] = int(visitors)
-                    row[f"{LOCALE_TO_ICON[locale]} 🔍"] = int(pageviews)
-                total_visitors += int(visitors)
-                total_pageviews += int(pageviews)
-            else:
-                row[LOCALE_TO_ICON[locale]] = "❌"
-                # Set missing locale visitor/pageview columns to 0
-                if show_anayltics_on_each_locale:
-                    row[f"{LOCALE_TO_ICON[locale]} 👤"] = 0
-                    row[f"{LOCALE_TO_ICON[locale]} 🔍"] = 0
-        row['Total Visitors'] = total_visitors
-        row['Total Pageviews'] = total_pageviews
-        table_data.append(row)
-    
-    return table_data
+    columns = ['Page Name', 'Available Locales', 'Published locales', 'Draft locales', 'Content Type']
+    for locale in locales:
+        icon = LOCALE_TO_ICON[locale]
+        columns.append(icon)
+        if show_anayltics_on_each_locale:
+            columns.extend([f"{icon} 👤", f"{icon} 🔍"])
+    columns.extend(['Total Visitors', 'Total Pageviews'])
+    return filtered_table[columns].reset_index(drop=not show_group_id)
 
-def calculate_summary_metrics(grouped_data, locales):
+def calculate_summary_metrics(group_table, locale_stories, locales):
     """
     Calculate summary metrics for the grouped data
     
     Args:
-        grouped_data: Dictionary of grouped story data
+        group_table: DataFrame returned by build_group_table
+        locale_stories: DataFrame returned by build_locale_stories
         locales: List of available locales
     
     Returns:
         Dictionary containing summary metrics
     """
-    total_groups = len(grouped_data)
-    total_pages = sum(len(data['locales']) for data in grouped_data.values())
-    published_pages = sum(
-        sum(1 for loc_data in data['locales'].values() if loc_data['published'])
-        for data in grouped_data.values()
-    )
-    total_visitors = sum(data.get('visitors', 0) for data in grouped_data.values())
-    total_pageviews = sum(data.get('pageviews', 0) for data in grouped_data.values())
-    coverage = (total_pages / (total_groups * len(locales))) * 100 if grouped_data else 0
+    total_groups = len(group_table)
+    total_pages = len(locale_stories)
+    coverage = (total_pages / (total_groups * len(locales))) * 100 if total_groups else 0
     
     return {
         'total_groups': total_groups,
         'total_pages': total_pages,
-        'published_pages': published_pages,
+        'published_pages': int(locale_stories['published'].sum()),
         'coverage': coverage,
-        'total_visitors': total_visitors,
-        'total_pageviews': total_pageviews
+        'total_visitors': int(locale_stories['visitors'].sum()),
+        'total_pageviews': int(locale_stories['pageviews'].sum())
     }
 
 def display_summary_metrics(metrics):
@@ -294,9 +303,7 @@ def display_paginated_table(df_sorted, items_per_page):
     if total_pages <= 1:
         # No pagination needed
         st.info(f"📊 Showing all {total_items} groups")
-        # Format numeric columns to display as integers
-        df_formatted = format_numeric_columns(df_sorted)
-        st.table(df_formatted)
+        st.table(df_sorted)
         return df_sorted
     
     # Reset pagination if needed (e.g., after filtering)
@@ -340,56 +347,22 @@ def display_paginated_table(df_sorted, items_per_page):
     
     # Get the current page data and display table
     df_page = df_sorted.iloc[start_idx:end_idx]
-    # Format numeric columns to display as integers
-    df_page_formatted = format_numeric_columns(df_page)
-    st.table(df_page_formatted)
+    st.table(df_page)
     
     return df_page
 
 def by_group_view(stories, analytics):
-    # Process stories to group by group_id
-    grouped_data = {}
-    locales = ['en', 'en-US', 'fr', 'nl', 'es']
-    content_types = [""]
-    for story in stories:
-        group_id = story.get('group_id')
-        if group_id:
-            if group_id not in grouped_data:
-                grouped_data[group_id] = {
-                    'group_id': group_id,
-                    'locales': {}
-                }
-            
-            # Extract locale from full_slug
-            full_slug = story.get('full_slug', '')
-            story_id = story.get('id')
-            locale = None
-            
-            for loc in locales:
-                if full_slug.startswith(loc + '/') or full_slug == loc:
-                    locale = loc
-                    break
-            
-            if locale:
-                grouped_data[group_id]['locales'][locale] = {
-                    'available': True,
-                    'link': f"https://app.storyblok.com/#/me/spaces/171339/stories/0/0/{story_id}",
-                    'story_id': story.get('id'),
-                    'story_name': story.get('name'),
-                    'published': story.get('published', False),
-                    "raw": story,
-                    "visitors": story.get('visitors', 0),
-                    "pageviews": story.get('pageviews', 0),
-                    "parent_id": story.get('parent_id')
-                }
-            if story.get('content_type') not in content_types:
-                content_types.append(story.get('content_type'))
+    # Process stories into one row per group/locale, then one row per group.
+    # Only the fields the view needs are passed so the cache key stays cheap to hash
+    locales = LOCALES
+    story_rows = tuple(tuple(story.get(field) for field in GROUP_VIEW_STORY_FIELDS) for story in stories)
+    locale_stories, group_table, content_types = build_group_view_data(story_rows, tuple(locales))
     
     # Create DataFrame for display
-    if grouped_data:
+    if len(group_table):
         # Summary metrics
         st.subheader("📊 Summary")
-        metrics = calculate_summary_metrics(grouped_data, locales)
+        metrics = calculate_summary_metrics(group_table, locale_stories, locales)
         display_summary_metrics(metrics)
         
         # Filters and controls
@@ -412,24 +385,13 @@ def by_group_view(stories, analytics):
         with col4:
             sort_order = st.selectbox(
                 "Sort by Available Locales",
-                [
-                    "Descending (Most visitors first)",
-                    "Ascending (Least visitors first)",
-                    "Descending (Most pageviews first)",
-                    "Ascending (Least pageviews first)",
-                    "Descending (Most locales first)", 
-                    "Ascending (Least locales first)",
-                    "Descending (Most published locales first)",
-                    "Ascending (Least published locales first)",
-                    "Descending (Most draft locales first)",
-                    "Ascending (Least draft locales first)",
-                ],
+                list(SORT_ORDERS),
                 index=0
             )
         with col5:
             items_per_page = st.selectbox(
                 "Items per page",
-                [10, 25, 50, 100],
+                ITEMS_PER_PAGE_OPTIONS,
                 index=1
             )
         
@@ -442,71 +404,63 @@ def by_group_view(stories, analytics):
         with col2:
             content_type_filter = st.selectbox("Filter by Content Type", content_types, index=0)
         
-        # Apply filters using the helper function
-        filtered_data = apply_filters(
-            grouped_data,
+        # Filtering and sorting only depend on the data and these settings, so
+        # pagination-only reruns reuse the table built on the previous run
+        table_key = (
+            hash(story_rows),
             show_published_only,
             show_draft_only,
             show_missing_locales,
             page_name_filter,
             content_type_filter,
-            locales
+            sort_order,
+            show_anayltics_on_each_locale,
+            show_group_id
         )
-        
-        # Create table data using helper function
-        table_data = create_table_data(filtered_data, locales, show_anayltics_on_each_locale, show_group_id)
-        # Create and sort DataFrame
-        df = pd.DataFrame(table_data)
-        column_to_sort = 'Available Locales'
-        ascending = False
-        if sort_order == "Descending (Most locales first)":
-            column_to_sort = 'Available Locales'
-            ascending = False
-        elif sort_order == "Ascending (Least locales first)":
-            column_to_sort = 'Available Locales'
-            ascending = True
-        if sort_order == "Descending (Most published locales first)":
-            column_to_sort = 'Published locales'
-            ascending = False
-        elif sort_order == "Ascending (Least published locales first)":
-            column_to_sort = 'Published locales'
-            ascending = True
-        elif sort_order == "Descending (Most draft locales first)":
-            column_to_sort = 'Draft locales'
-            ascending = False
-        elif sort_order == "Ascending (Least draft locales first)":
-            column_to_sort = 'Draft locales'
-            ascending = True
-        elif sort_order == "Descending (Most visitors first)":
-            column_to_sort = 'Total Visitors'
-            ascending = False
-        elif sort_order == "Ascending (Least visitors first)":
-            column_to_sort = 'Total Visitors'
-            ascending = True
-        elif sort_order == "Descending (Most pageviews first)":
-            column_to_sort = 'Total Pageviews'
-            ascending = False
-        elif sort_order == "Ascending (Least pageviews first)":
-            column_to_sort = 'Total Pageviews'
-            ascending = True
-            
-        if df.shape[0] > 0:
-            df_sorted = df.sort_values(column_to_sort, ascending=ascending)
+        cached_table = st.session_state.get('group_view_table')
+        if cached_table is not None and cached_table[0] == table_key:
+            _, df_sorted = cached_table
         else:
-            df_sorted = df
+            # Apply filters using the helper function
+            filtered_table = apply_filters(
+                group_table,
+                locale_stories,
+                show_published_only,
+                show_draft_only,
+                show_missing_locales,
+                page_name_filter,
+                content_type_filter,
+                locales
+            )
+            
+            # Select displayed columns and sort
+            df = create_table_data(filtered_table, locales, show_anayltics_on_each_locale, show_group_id)
+            column_to_sort, ascending = SORT_ORDERS[sort_order]
+            
+            # Sort keys are integer counts, a stable argsort on the single column is enough
+            # (descending negates the keys so ties keep their original order)
+            sort_values = df[column_to_sort].to_numpy()
+            order = np.argsort(sort_values if ascending else -sort_values, kind='stable')
+            df_sorted = df.iloc[order]
+            st.session_state.group_view_table = (table_key, df_sorted)
         
         # Display paginated table
         display_paginated_table(df_sorted, items_per_page)
     else:
         st.warning("🔍 No pages with group_id found in your stories.")
 
-def get_visitor_pageview_data(page, analytics):
-    for item in analytics:
-        if item.get('page') == page:
-            return item.get('visitors'), item.get('pageviews')
-    if len(page.split("/")) == 2:
-        print(f"No analytics found for {page}")
-    return 0, 0
+def build_analytics_lookup(analytics):
+    """
+    Index analytics by page path
+    
+    Args:
+        analytics: List of Plausible page results
+    
+    Returns:
+        Dictionary mapping page path to a (visitors, pageviews) tuple,
+        the first result wins when a page appears more than once
+    """
+    return {item.get('page'): (item.get('visitors'), item.get('pageviews')) for item in reversed(analytics)}
 
 @st.dialog("🔗 Confirm Page Grouping")
 def confirm_grouping_dialog(page_ids, page_names):
@@ -529,6 +483,7 @@ def confirm_grouping_dialog(page_ids, page_names):
             if new_group_id:
                 st.success(f"✅ Pages grouped successfully with group_id: {new_group_id}")
                 st.cache_data.clear()
+                fetch_all_stories.clear()
             else:
                 st.error("❌ Failed to group pages. Please try again.")
             
@@ -539,22 +494,11 @@ def confirm_grouping_dialog(page_ids, page_names):
             st.rerun()
 
 def by_page_view(stories, analytics):
-    page_data = []
-    content_types = [""]
-    for story in stories:
-        page_data.append({
-            'Group ID': story.get('group_id', ''),
-            'Page Name': story.get('name'),
-            'Page ID': story.get('id'),
-            'Page Link': f"https://app.storyblok.com/#/me/spaces/171339/stories/0/0/{story.get('id')}",
-            'Page Published': story.get('published', False),
-            'Page Content Type': story.get('content_type', ''),
-            'Page Slug': story.get('full_slug', ''),
-            'Page Visitors': story.get('visitors', "NA"),
-            'Page Pageviews': story.get('pageviews', "NA"),
-        })
-        if story.get('content_type') not in content_types:
-            content_types.append(story.get('content_type'))
+    df = pd.DataFrame.from_records(stories, columns=list(PAGE_VIEW_COLUMNS))
+    df = df.fillna({'group_id': '', 'published': False, 'content_type': '', 'full_slug': '', 'visitors': "NA", 'pageviews': "NA"})
+    df['link'] = STORYBLOK_STORY_LINK + df['id'].astype(str)
+    df = df.rename(columns=PAGE_VIEW_COLUMNS)
+    content_types = [""] + [content_type for content_type in df['Page Content Type'].unique() if content_type != ""]
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     with col1:
         st.subheader("Group ID")
@@ -575,37 +519,37 @@ def by_page_view(stories, analytics):
         st.subheader("Page Slug")
         page_slug_filter_page_level = st.text_input("Filter by Page Slug (Page level)", placeholder="Enter part of page slug...")
 
+    # Filters are combined into one boolean mask over the page table
+    mask = np.ones(len(df), dtype=bool)
     if group_id_filter_page_level:
-        page_data = [page for page in page_data if page.get('Group ID') == group_id_filter_page_level]
+        mask &= (df['Group ID'] == group_id_filter_page_level).to_numpy()
     if page_name_filter_page_level:
-        page_data = [page for page in page_data if page.get('Page Name') == page_name_filter_page_level]
+        mask &= (df['Page Name'] == page_name_filter_page_level).to_numpy()
     if page_id_filter_page_level:
-        page_data = [page for page in page_data if page.get('Page ID') == page_id_filter_page_level]
+        mask &= (df['Page ID'] == page_id_filter_page_level).to_numpy()
     if show_published_only_page_level:
-        page_data = [page for page in page_data if page.get('Page Published')]
+        mask &= df['Page Published'].fillna(False).astype(bool).to_numpy()
     if content_type_filter_page_level:
-        page_data = [page for page in page_data if page.get('Page Content Type') == content_type_filter_page_level]
+        mask &= (df['Page Content Type'] == content_type_filter_page_level).to_numpy()
     if page_slug_filter_page_level:
-        page_data = [page for page in page_data if page.get('Page Slug') == page_slug_filter_page_level]
+        mask &= (df['Page Slug'] == page_slug_filter_page_level).to_numpy()
+    df = df[mask]
 
-    if page_data:
-        df = pd.DataFrame(page_data)
-        # Format numeric columns to display as integers
-        df_formatted = format_numeric_columns(df)
+    if len(df):
         event = st.dataframe(
-            df_formatted, 
+            df, 
             hide_index=True,
             on_select="rerun",
             selection_mode="multi-row"
         )
         if event.selection.get('rows'):
             # Prepare selected pages data
-            page_ids = []
-            page_names = []
-            for i in event.selection.get('rows'):
-                page = df.iloc[i]
-                page_ids.append(page.get('Page ID'))
-                page_names.append(f"[{page.get('Page Name')}](https://dashdoc.com/{page.get('Page Slug')})")
+            rows = event.selection.get('rows')
+            page_id_values = df['Page ID'].to_numpy()
+            page_name_values = df['Page Name'].to_numpy()
+            page_slug_values = df['Page Slug'].to_numpy()
+            page_ids = [page_id_values[i] for i in rows]
+            page_names = [f"[{page_name_values[i]}](https://dashdoc.com/{page_slug_values[i]})" for i in rows]
             
             st.markdown(f"**Selected pages for grouping:** {', '.join(page_names)}")
             
@@ -621,15 +565,18 @@ def by_analytics_view(analytics):
 
 def page_language_grouping_app(stories, analytics, dev_mode=False):
     """Page Language Grouping Tool"""
-    print("Loading Page Language Grouping App...")
     st.header("🌍 Page Language Grouping")
     st.markdown("View and manage pages grouped by language across different locales")
+    analytics_by_page = build_analytics_lookup(analytics)
+    # The fetched stories are shared between sessions (st.cache_resource), so copies are annotated
+    annotated_stories = []
     for story in stories:
-        if story.get('full_slug')[-1] == "/":
-            story['full_slug'] = story.get('full_slug')[:-1]
-        visitors, pageviews = get_visitor_pageview_data("/" + story.get('full_slug'), analytics)
-        story['visitors'] = visitors
-        story['pageviews'] = pageviews
+        # Drop a single trailing slash so the slug matches Plausible page paths
+        full_slug = (story.get('full_slug') or '').removesuffix('/')
+        visitors, pageviews = analytics_by_page.get("/" + full_slug, (0, 0))
+        # Coerced once here so the views can rely on integer analytics columns
+        annotated_stories.append({**story, 'full_slug': full_slug, 'visitors': int(visitors or 0), 'pageviews': int(pageviews or 0)})
+    stories = annotated_stories
     if not stories:
         st.warning("⚠️ No stories found or error occurred while fetching.")
         return
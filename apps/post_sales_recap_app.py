@@ -1,15 +1,27 @@
 import streamlit as st
-import os
-import tempfile
 import json
+import re
 import hashlib
-from datetime import datetime, timezone
+import functools
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from openai import OpenAI
-from utils.hubspot import get_hubspot_company_data, send_company_data_to_hubspot, get_tms_list_for_field, create_contact_in_hubspot, associate_contact_to_company
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.hubspot import get_hubspot_company_data, send_company_data_to_hubspot, get_tms_list_for_field, create_contacts_in_hubspot_batch
+from utils.cache import save_fallback, load_cached
+from utils.http import with_request_log
+
+logger = logging.getLogger(__name__)
+
 # Initialize OpenAI client
 client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
 
-TMS_LIST = [""] + get_tms_list_for_field()
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_tms_list():
+    """TMS options of the HubSpot company field, with an empty first option, refreshed every hour"""
+    return [""] + get_tms_list_for_field()
 
 # OpenAI Structured Output JSON Schema for sales data extraction
 SALES_DATA_SCHEMA = {
@@ -44,7 +56,7 @@ SALES_DATA_SCHEMA = {
             "current_tms": {
                 "type": "string",
                 "description": "Current Transport Management System in use. Include: system name, version, how long they've used it, satisfaction level, specific pain points, integration capabilities, data migration challenges, and why they're looking to change. This helps CS understand technical migration complexity and potential integration requirements.",
-                "enum": TMS_LIST,
+                # "enum" is filled with get_tms_list() by get_sales_data_schema()
             },
             "mrr_start_date": {
                 "type": "string",
@@ -93,6 +105,39 @@ SALES_DATA_SCHEMA = {
     },
     "strict": True
 }
+# Schema fields in form order and their JSON types, read once instead of walking the schema on each render
+SALES_DATA_FIELDS = tuple(SALES_DATA_SCHEMA["schema"]["properties"])
+SALES_DATA_FIELD_TYPES = {field: properties["type"] for field, properties in SALES_DATA_SCHEMA["schema"]["properties"].items()}
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def build_tms_derived_data(tms_options):
+    """
+    Build everything derived from the TMS options, keyed on the options so they always agree
+    
+    Args:
+        tms_options: Tuple of TMS options as returned by get_tms_list
+    
+    Returns:
+        Tuple of (options frozenset for membership checks, first options as listed in the extraction
+        prompt, SALES_DATA_SCHEMA with the options as the current_tms enum), shared and only read
+    """
+    options_text = ', '.join(tms_options[:10]) + ('...' if len(tms_options) > 10 else '')
+    properties = dict(SALES_DATA_SCHEMA["schema"]["properties"])
+    properties["current_tms"] = {**properties["current_tms"], "enum": list(tms_options)}
+    schema = {**SALES_DATA_SCHEMA, "schema": {**SALES_DATA_SCHEMA["schema"], "properties": properties}}
+    return frozenset(tms_options), options_text, schema
+
+def get_tms_options_set():
+    """TMS options as a frozenset for membership checks"""
+    return build_tms_derived_data(tuple(get_tms_list()))[0]
+
+def get_tms_options_text():
+    """First TMS options as listed in the extraction prompt"""
+    return build_tms_derived_data(tuple(get_tms_list()))[1]
+
+def get_sales_data_schema():
+    """SALES_DATA_SCHEMA with the current TMS options as the current_tms enum"""
+    return build_tms_derived_data(tuple(get_tms_list()))[2]
 
 FIELD_NAME_MAPPING = {
     "company_org_key_people": "Company Org & Key People",
@@ -110,6 +155,15 @@ FIELD_NAME_MAPPING = {
     "cross_dock_notes": "Cross Dock Details"
 }
 
+# (field, human readable name) of every schema field in form order, see get_human_readable_field_name
+SALES_DATA_FIELD_LABELS = tuple((field, FIELD_NAME_MAPPING.get(field, field.replace('_', ' ').title())) for field in SALES_DATA_FIELDS)
+
+# Contacts created on save: (label, schema field prefix, HubSpot buying role)
+HUBSPOT_CONTACT_ROLES = [
+    ("Project Manager", "project_manager", "Project manager"),
+    ("Decision Maker", "decision_maker", "DECISION_MAKER"),
+]
+
 SALES_DATA_SCHEMA_TO_COMPANY_HUBSPOT_FIELDS_MAPPING = {
     "company_org_key_people": "company_org___key_people",
     "warning_note": "warning_note",
@@ -149,189 +203,310 @@ Focus on capturing information that will help Customer Success:
 CONTEXT: TODAY IS {TODAY_DATE}
 """
 
+# Appended to SYSTEM_PROMPT when structured data has already been accumulated
+EXISTING_CONTEXT_TEMPLATE = """
+
+CURRENT ACCUMULATED DATA:
+{data}
+
+IMPORTANT: Use the current data as a baseline and only update fields with NEW information from the transcript. 
+- If a field already has meaningful data, only update it if the transcript provides MORE SPECIFIC or CORRECTED information
+- If a field is empty or contains placeholder values, fill it with relevant information from the transcript
+- Preserve existing data unless the transcript explicitly contradicts or provides better information
+- For numeric fields, only update if the transcript provides a specific number (don't overwrite with 0 unless explicitly mentioned)
+- For the 'current_tms' field: Only update if the transcript explicitly mentions a specific TMS system name. If no TMS is mentioned or the mention is unclear, leave the field empty to preserve existing data.
+- Available TMS options: {tms_options}
+"""
+# Chat model of every completion, it supports structured outputs
+CHAT_MODEL = "gpt-4o-2024-08-06"
+# whisper-1 cannot stream its output, the gpt-4o transcription models can
+TRANSCRIPTION_MODEL = "gpt-4o-transcribe"
+# Bump when SYSTEM_PROMPT, EXISTING_CONTEXT_TEMPLATE or SALES_DATA_SCHEMA change so cached extractions are not reused
+PROMPT_VERSION = "v3"
+# OpenAI results are cached on disk (see utils/cache.py) and reused for identical inputs,
+# they hold customer call data so older files are deleted whenever a new result is saved
+LLM_CACHE_MAX_AGE = timedelta(days=7)
+# Near-duplicate transcripts of the same company (same accumulated data, embedding similarity
+# above the threshold) reuse the previous extraction, see extract_structured_data_cached
+SEMANTIC_CACHE_EMBEDDING_MODEL = "text-embedding-3-small"
+SEMANTIC_CACHE_MIN_SIMILARITY = 0.95
+SEMANTIC_CACHE_MAX_ENTRIES = 50
+# Punctuation ignored in cache keys, except inside numbers such as 3.5 or 1,000
+TRANSCRIPT_CACHE_IGNORED_PUNCTUATION = re.compile(r"(?<!\d)[^\w\s]|[^\w\s](?!\d)")
+
 def transcribe_audio(audio_file):
-    """Transcribe audio using OpenAI Whisper API"""
+    """Transcribe audio using the OpenAI transcription API, streaming the text as it is produced"""
     try:
         # Handle UploadedFile object from st.audio_input()
-        if hasattr(audio_file, 'read'):
-            # It's an UploadedFile object, read the bytes
-            audio_bytes = audio_file.read()
-            # Reset file pointer for potential reuse
+        is_file = hasattr(audio_file, 'read')
+        if is_file:
+            # It's an UploadedFile object, it is uploaded as is rather than copied into new bytes
             audio_file.seek(0)
-        else:
-            # It's already bytes
-            audio_bytes = audio_file
         
-        # Create a temporary file to store the audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_file.flush()
-            
-            # Transcribe using OpenAI Whisper
-            with open(tmp_file.name, "rb") as audio_file_handle:
-                transcript = client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file_handle
-                )
-            
-            # Clean up temporary file
-            os.unlink(tmp_file.name)
-            return transcript.text
+        # Transcribe with a streaming model, the audio is uploaded directly as a named file
+        transcript_stream = client.audio.transcriptions.create(
+            model=TRANSCRIPTION_MODEL,
+            file=("audio.wav", audio_file, "audio/wav"),
+            stream=True
+        )
+        
+        # Show the transcript as it comes in instead of waiting on the whole recording
+        transcript_placeholder = st.empty()
+        transcript_text = ""
+        for event in transcript_stream:
+            if event.type == "transcript.text.delta":
+                transcript_text += event.delta
+                transcript_placeholder.caption(transcript_text)
+            elif event.type == "transcript.text.done":
+                transcript_text = event.text
+        transcript_placeholder.empty()
+        
+        if is_file:
+            # Reset file pointer for potential reuse
+            audio_file.seek(0)
+        return transcript_text
     except Exception as e:
         st.error(f"Error transcribing audio: {str(e)}")
         return None
 
+def create_chat_completion(messages, model=CHAT_MODEL, **kwargs):
+    """Text content of a chat completion, errors are handled by the callers"""
+    response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+    return response.choices[0].message.content
+
 def get_ai_response(messages):
     """Get response from OpenAI GPT model"""
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",
-            messages=messages,
-            max_completion_tokens=500,
-        )
-        return response.choices[0].message.content
+        return create_chat_completion(messages, max_completion_tokens=500)
     except Exception as e:
         st.error(f"Error getting AI response: {str(e)}")
         return None
 
+@functools.lru_cache(maxsize=2)
+def get_system_prompt(today_date):
+    """SYSTEM_PROMPT for the given day, formatted once per day"""
+    return SYSTEM_PROMPT.strip().format(TODAY_DATE=today_date)
+
+def build_extraction_request(transcript, existing_data=None):
+    """Build the chat completion arguments extracting structured sales data from a transcript"""
+    # Build context about existing data, a freshly initialized all-empty record adds nothing to the prompt
+    existing_context = ""
+    if existing_data and get_filled_fields(existing_data):
+        existing_context = EXISTING_CONTEXT_TEMPLATE.format(
+            data=json.dumps(existing_data, separators=(",", ":")),
+            tms_options=get_tms_options_text()
+        )
+
+    messages = [
+        {
+            "role": "system", 
+            "content": get_system_prompt(datetime.now().strftime("%Y-%m-%d")) + existing_context
+        },
+        {
+            "role": "user", 
+            "content": f"Please extract structured sales information from the following transcript:\n\n{transcript}"
+        }
+    ]
+    
+    return {
+        "model": CHAT_MODEL,
+        "messages": messages,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": get_sales_data_schema()
+        }
+    }
+
 def extract_structured_data(transcript, existing_data=None):
     """Extract structured sales data from transcript using OpenAI Structured Outputs"""
     try:
-        # Build context about existing data
-        existing_context = ""
-        if existing_data:
-            existing_context = f"""
-
-CURRENT ACCUMULATED DATA:
-{json.dumps(existing_data, indent=2)}
-
-IMPORTANT: Use the current data as a baseline and only update fields with NEW information from the transcript. 
-- If a field already has meaningful data, only update it if the transcript provides MORE SPECIFIC or CORRECTED information
-- If a field is empty or contains placeholder values, fill it with relevant information from the transcript
-- Preserve existing data unless the transcript explicitly contradicts or provides better information
-- For numeric fields, only update if the transcript provides a specific number (don't overwrite with 0 unless explicitly mentioned)
-- For the 'current_tms' field: Only update if the transcript explicitly mentions a specific TMS system name. If no TMS is mentioned or the mention is unclear, leave the field empty to preserve existing data.
-- Available TMS options: {', '.join(TMS_LIST[:10])}{'...' if len(TMS_LIST) > 10 else ''}
-"""
-
-        messages = [
-            {
-                "role": "system", 
-                "content": SYSTEM_PROMPT.strip().format(TODAY_DATE=datetime.now().strftime("%Y-%m-%d")) + existing_context
-            },
-            {
-                "role": "user", 
-                "content": f"Please extract structured sales information from the following transcript:\n\n{transcript}"
-            }
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",  # Using the model that supports structured outputs
-            messages=messages,
-            response_format={
-                "type": "json_schema",
-                "json_schema": SALES_DATA_SCHEMA
-            }
-        )
+        content = create_chat_completion(**build_extraction_request(transcript, existing_data))
         
         # Parse the JSON response
-        extracted_data = json.loads(response.choices[0].message.content)
+        extracted_data = json.loads(content)
         return extracted_data
             
     except Exception as e:
         st.error(f"Error extracting structured data: {str(e)}")
         return None
 
+# Placeholder values the model uses for missing information
+EMPTY_PLACEHOLDERS = frozenset({'not mentioned', 'n/a', 'none', ''})
+
+# Emptiness checks dispatched on the exact value type, other types are never empty
+FIELD_EMPTY_CHECKS = {
+    type(None): lambda value: True,
+    # Same as not value.strip() without building the stripped copy
+    str: lambda value: not value or value.isspace(),
+    # Form fields show 0 as missing
+    int: lambda value: value <= 0,
+    float: lambda value: value <= 0,
+    bool: lambda value: value <= 0,
+}
+MERGE_EMPTY_CHECKS = {
+    type(None): lambda value: True,
+    str: lambda value: value.strip().lower() in EMPTY_PLACEHOLDERS,
+    # For numeric fields, only negative numbers are invalid, 0 is a valid value that should be preserved
+    int: lambda value: value < 0,
+    float: lambda value: value < 0,
+    bool: lambda value: value < 0,
+}
+
+def never_empty(value):
+    return False
+
 # Helper function to check if field is empty or contains placeholder text
 def is_field_empty(value):
-    if value is None:
-        return True
-    if isinstance(value, str):
-        return not value or not value.strip()
-    if isinstance(value, (int, float)):
-        # For integer fields, only consider negative numbers as invalid
-        # 0 is a valid value that should not be considered empty
-        return value <= 0
-    return False
+    return FIELD_EMPTY_CHECKS.get(type(value), never_empty)(value)
 
+def is_empty_value(value):
+    """Check if a value extracted by the model is considered empty"""
+    return MERGE_EMPTY_CHECKS.get(type(value), never_empty)(value)
 
-def merge_structured_data(existing_data, new_data):
-    """Merge new structured data with existing data, updating only non-empty fields"""
+
+def merge_structured_data(existing_data, new_data, inplace=False):
+    """Merge new structured data with existing data, updating only non-empty fields (in existing_data itself if inplace)"""
     if not existing_data:
         return new_data
     
-    merged_data = existing_data.copy()
-    
-    def is_empty_value(value):
-        """Check if a value is considered empty"""
-        if value is None:
-            return True
-        if isinstance(value, str):
-            return not value.strip() or value.strip().lower() in ['not mentioned', 'n/a', 'none', '']
-        if isinstance(value, (int, float)):
-            # For integer fields, only consider negative numbers as invalid
-            # 0 is a valid value that should be preserved
-            return value < 0
-        return False
-    
-    def is_valid_tms_value(value):
-        """Check if TMS value is valid (exists in TMS_LIST)"""
-        if not value or not isinstance(value, str):
-            return False
-        return value.strip() in TMS_LIST
-    
-    for key, value in new_data.items():
-        # Special handling for TMS field
-        if key == 'current_tms':
-            # Only update TMS if the new value is valid and not empty
-            if is_valid_tms_value(value) and not is_empty_value(value):
-                merged_data[key] = value
-            # If existing TMS is valid, preserve it even if new value is empty/invalid
-            elif is_valid_tms_value(existing_data.get(key)):
-                # Keep existing value, don't overwrite with empty/invalid
-                pass
-        else:
-            # Update field if new value is not empty
-            if not is_empty_value(value):
-                merged_data[key] = value
+    updates = {key: value for key, value in new_data.items() if key != 'current_tms' and not is_empty_value(value)}
+    # Only update TMS if the new value is a known TMS option, otherwise the existing value is kept
+    tms = new_data.get('current_tms')
+    if isinstance(tms, str) and not is_empty_value(tms) and tms.strip() in get_tms_options_set():
+        updates['current_tms'] = tms
     
-    return merged_data
+    if inplace:
+        existing_data.update(updates)
+        return existing_data
+    return {**existing_data, **updates}
 
-def generate_summary(transcript):
-    """Generate a concise summary of the transcribed audio"""
+def generate_summary(transcript, placeholder=None):
+    """Generate a concise summary of the transcribed audio, streamed into the placeholder if one is given"""
     try:
         messages = [
             {"role": "system", "content": "You are a helpful assistant that creates concise, professional summaries of conversations or notes. Focus on key points, action items, and important details."},
             {"role": "user", "content": f"Please provide a concise summary of the following transcript:\n\n{transcript}"}
         ]
         
-        response = client.chat.completions.create(
-            model="gpt-4o-2024-08-06",  # Using consistent model with structured outputs support
-            messages=messages,
-        )
-        return response.choices[0].message.content
+        if placeholder is None:
+            return create_chat_completion(messages)
+        
+        # Show the summary as it is generated, the structured data extraction runs meanwhile
+        summary_stream = client.chat.completions.create(model=CHAT_MODEL, messages=messages, stream=True)
+        summary = ""
+        for chunk in summary_stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                summary += chunk.choices[0].delta.content
+                placeholder.caption(summary)
+        return summary
     except Exception as e:
         st.error(f"Error generating summary: {str(e)}")
         return None
 
+def transcribe_audio_cached(audio_bytes, audio_digest):
+    """transcribe_audio, reusing the cached transcript of the same recording"""
+    cache_key = {"audio_digest": audio_digest}
+    cached = load_cached("transcript", cache_key, LLM_CACHE_MAX_AGE)
+    if cached:
+        return cached
+    
+    transcript = transcribe_audio(audio_bytes)
+    if transcript:
+        save_fallback("transcript", cache_key, transcript, LLM_CACHE_MAX_AGE)
+    return transcript
+
+def normalize_transcript(transcript):
+    """Transcript as used in cache keys, so that case, spacing and punctuation differences still hit the cache"""
+    return " ".join(TRANSCRIPT_CACHE_IGNORED_PUNCTUATION.sub("", transcript.lower()).split())
+
+def generate_summary_cached(transcript, placeholder=None):
+    """generate_summary, reusing the cached summary of the same transcript"""
+    cache_key = {"transcript": normalize_transcript(transcript)}
+    cached = load_cached("summary", cache_key, LLM_CACHE_MAX_AGE)
+    if cached:
+        return cached
+    
+    summary = generate_summary(transcript, placeholder)
+    if summary:
+        save_fallback("summary", cache_key, summary, LLM_CACHE_MAX_AGE)
+    return summary
+
+def extract_structured_data_cached(transcript, existing_data=None, company_id=None):
+    """
+    extract_structured_data, reusing the cached result for the same transcript, data and prompt
+    
+    With a company_id, a near-duplicate transcript of the same company (same accumulated data,
+    embedding similarity above SEMANTIC_CACHE_MIN_SIMILARITY) also reuses its extraction
+    """
+    cache_key = {
+        "transcript": normalize_transcript(transcript),
+        "existing_data": existing_data,
+        "prompt_version": PROMPT_VERSION,
+        "today": datetime.now().strftime("%Y-%m-%d"),
+    }
+    cached = load_cached("extraction", cache_key, LLM_CACHE_MAX_AGE)
+    if cached:
+        return cached
+    
+    if not company_id:
+        extracted_data = extract_structured_data(transcript, existing_data)
+        if extracted_data:
+            save_fallback("extraction", cache_key, extracted_data, LLM_CACHE_MAX_AGE)
+        return extracted_data
+    
+    # Semantic cache entries are grouped by company and everything in the key but the transcript,
+    # extractions are never shared between customers
+    semantic_cache_key = {key: value for key, value in cache_key.items() if key != "transcript"}
+    semantic_cache_key["company_id"] = company_id
+    semantic_entries = load_cached("extraction_semantic", semantic_cache_key, LLM_CACHE_MAX_AGE) or []
+    # The extraction starts right away so a cache miss doesn't wait for the embedding first,
+    # on a hit it is discarded without waiting for it
+    executor = ThreadPoolExecutor(max_workers=1, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx()))
+    extraction_future = executor.submit(extract_structured_data, transcript, existing_data)
+    executor.shutdown(wait=False)
+    embedding = embed_transcript(transcript)
+    if embedding is not None:
+        similar_data = find_similar_extraction(semantic_entries, embedding)
+        if similar_data:
+            return similar_data
+    extracted_data = extraction_future.result()
+    
+    if extracted_data:
+        save_fallback("extraction", cache_key, extracted_data, LLM_CACHE_MAX_AGE)
+        if embedding is not None:
+            semantic_entries.append({"embedding": embedding, "structured_data": extracted_data})
+            save_fallback("extraction_semantic", semantic_cache_key, semantic_entries[-SEMANTIC_CACHE_MAX_ENTRIES:], LLM_CACHE_MAX_AGE)
+    return extracted_data
+
+def embed_transcript(transcript):
+    """Embed the transcript for the semantic extraction cache, None if the call fails"""
+    try:
+        response = client.embeddings.create(model=SEMANTIC_CACHE_EMBEDDING_MODEL, input=transcript)
+        return response.data[0].embedding
+    except Exception as e:
+        print(f"⚠️ Could not embed transcript for the semantic cache: {str(e)}")
+        return None
+
+def find_similar_extraction(semantic_entries, embedding):
+    """Structured data of the most similar cached transcript, None below SEMANTIC_CACHE_MIN_SIMILARITY"""
+    if not semantic_entries:
+        return None
+    # OpenAI embeddings have unit length, so the dot product is the cosine similarity
+    cached_embeddings = np.array([entry["embedding"] for entry in semantic_entries], dtype=np.float32)
+    similarities = cached_embeddings @ np.asarray(embedding, dtype=np.float32)
+    best_match = int(np.argmax(similarities))
+    if similarities[best_match] < SEMANTIC_CACHE_MIN_SIMILARITY:
+        return None
+    return semantic_entries[best_match]["structured_data"]
+
+
+# Built once, copied per session since the accumulated data is merged in place
+EMPTY_STRUCTURED_DATA = {field: 0 if field_type == "integer" else "" for field, field_type in SALES_DATA_FIELD_TYPES.items()}
 
 def initialize_empty_structured_data():
     """Initialize all structured data fields to empty values"""
-    all_required_fields = SALES_DATA_SCHEMA.get("schema").get("properties").keys()
-    empty_data = {}
-    
-    for field in all_required_fields:
-        field_properties = SALES_DATA_SCHEMA.get("schema").get("properties").get(field)
-        field_type = field_properties.get("type")
-        
-        if field_type == "integer":
-            empty_data[field] = 0
-        elif field_type == "string":
-            empty_data[field] = ""
-        else:
-            empty_data[field] = ""
-    
-    return empty_data
+    # Values are only strings and integers, a shallow copy is enough
+    return dict(EMPTY_STRUCTURED_DATA)
 
 def clear_all_data():
     """Clear all accumulated data from session state"""
@@ -347,25 +522,14 @@ def clear_all_data():
         if key in st.session_state:
             del st.session_state[key]
     
-    field_keys_to_clear = [
-        'field_company_org_key_people',
-        'field_project_manager',
-        'field_decision_maker',
-        'field_warnings_disclaimers',
-        'field_current_tms',
-        'field_mrr_start_date',
-        'field_number_sites_entities',
-        'field_number_truckers',
-        'field_activities_notes',
-        'field_group_network_details',
-        'field_cross_dock_notes'
-    ]   
-    for key in field_keys_to_clear:
-        if key in st.session_state:
-            del st.session_state[key]
+    # Form widgets are keyed field_<schema field>, see create_field_input
+    for field in SALES_DATA_FIELDS:
+        st.session_state.pop(f"field_{field}", None)
     
     # Initialize empty structured data
     st.session_state.accumulated_structured_data = initialize_empty_structured_data()
+    # Reload the company from HubSpot instead of showing the cached one
+    get_hubspot_company_data.clear()
     
     st.success("All data cleared! You can start fresh.")
     st.rerun()
@@ -388,9 +552,13 @@ def render_app_header(hubspot_id=None):
             with col21:
                 st.markdown(f"[View in HubSpot](https://app.hubspot.com/contacts/9184177/record/0-2/{hubspot_id_input})")
             with col22:
-                company_data = get_hubspot_company_data(hubspot_id_input)
-                company_name = company_data.get('properties', {}).get('name', "")
-                st.success(f"🏢 {company_name}")
+                try:
+                    company_data = get_hubspot_company_data(hubspot_id_input)
+                    company_name = company_data.get('properties', {}).get('name', "")
+                    st.success(f"🏢 {company_name}")
+                except Exception as e:
+                    company_name = ""
+                    st.error(f"❌ Could not load the company from HubSpot: {str(e)}")
                 st.session_state.hubspot_company_id = hubspot_id_input
                 st.session_state.hubspot_company_name = company_name
         else:
@@ -433,7 +601,8 @@ def process_audio_input(audio_bytes, dev_mode=False):
     if not audio_bytes:
         return
     
-    current_audio_hash = hashlib.md5(audio_bytes.getvalue()).hexdigest()
+    # BLAKE2 over a zero-copy view of the upload, the recording is never duplicated in memory
+    current_audio_hash = hashlib.blake2b(audio_bytes.getbuffer(), digest_size=16).hexdigest()
     audio_already_processed = st.session_state.get('last_processed_audio_hash') == current_audio_hash
     
     if audio_already_processed:
@@ -443,7 +612,7 @@ def process_audio_input(audio_bytes, dev_mode=False):
     with st.spinner("🔈 Auto-processing audio..."):
         # Transcribe audio
         with st.spinner("✍️ Transcribing audio..."):
-            transcript = transcribe_audio(audio_bytes)
+            transcript = transcribe_audio_cached(audio_bytes, current_audio_hash)
             if not transcript:
                 st.error("❌ Failed to transcribe audio")
                 return
@@ -460,29 +629,37 @@ def process_audio_input(audio_bytes, dev_mode=False):
         # Store the latest transcript for display
         st.session_state.last_transcript = transcript
         
-        # Generate and accumulate summary
-        with st.spinner("💬 Generating summary..."):
-            summary = generate_summary(transcript)
-            if summary:
-                if hasattr(st.session_state, 'accumulated_summary') and st.session_state.accumulated_summary:
-                    st.session_state.accumulated_summary += f"\n\n--- Additional Notes ---\n{summary}"
-                else:
-                    st.session_state.accumulated_summary = summary
+        # Summary and structured data only depend on the transcript, so both OpenAI calls run concurrently
+        existing_data = st.session_state.get('accumulated_structured_data', {})
+        summary_placeholder = st.empty()
+        with st.spinner("💬 Generating summary and extracting data..."):
+            with ThreadPoolExecutor(max_workers=2, initializer=add_script_run_ctx, initargs=(None, get_script_run_ctx())) as executor:
+                summary_future = executor.submit(generate_summary_cached, transcript, summary_placeholder)
+                structured_data_future = executor.submit(
+                    extract_structured_data_cached, transcript, existing_data, st.session_state.get("hubspot_company_id")
+                )
+                summary = summary_future.result()
+                new_structured_data = structured_data_future.result()
+        summary_placeholder.empty()
         
-        # Extract and merge structured data
-        with st.spinner("🔍 Extracting data..."):
-            existing_data = st.session_state.get('accumulated_structured_data', {})
-            new_structured_data = extract_structured_data(transcript, existing_data)
-            if new_structured_data:
-                # Debug: Show what's being merged (can be enabled for debugging)
-                if dev_mode:
-                    st.write("🔍 Debug - Existing TMS:", existing_data.get('current_tms', 'None'))
-                    st.write("🔍 Debug - New TMS:", new_structured_data.get('current_tms', 'None'))
-                
-                st.session_state.accumulated_structured_data = merge_structured_data(existing_data, new_structured_data)
-                st.success("✅ Audio automatically processed, summary updated!")
+        # Accumulate summary
+        if summary:
+            if hasattr(st.session_state, 'accumulated_summary') and st.session_state.accumulated_summary:
+                st.session_state.accumulated_summary += f"\n\n--- Additional Notes ---\n{summary}"
             else:
-                st.error("❌ Failed to extract structured data")
+                st.session_state.accumulated_summary = summary
+        
+        # Merge structured data
+        if new_structured_data:
+            # Debug: Show what's being merged (can be enabled for debugging)
+            if dev_mode:
+                st.write("🔍 Debug - Existing TMS:", existing_data.get('current_tms', 'None'))
+                st.write("🔍 Debug - New TMS:", new_structured_data.get('current_tms', 'None'))
+            
+            st.session_state.accumulated_structured_data = merge_structured_data(existing_data, new_structured_data, inplace=True)
+            st.success("✅ Audio automatically processed, summary updated!")
+        else:
+            st.error("❌ Failed to extract structured data")
 
 
 def render_audio_input_section(dev_mode=False):
@@ -501,20 +678,28 @@ def render_audio_input_section(dev_mode=False):
     process_audio_input(audio_bytes, dev_mode)
 
 
+def format_value_for_input(val):
+    """Format value based on type for display and editing"""
+    if val is None:
+        return ""
+    elif isinstance(val, (int, float)):
+        return str(val) if val >= 0 else ""
+    else:
+        return str(val) if val and val.lower() not in ['not mentioned', 'n/a', 'none', 'not specified'] else ""
+
+
+def sync_field_input(key):
+    """Store a field edited in the form in the accumulated structured data"""
+    if 'accumulated_structured_data' not in st.session_state:
+        st.session_state.accumulated_structured_data = {}
+    st.session_state.accumulated_structured_data[key] = st.session_state[f"field_{key}"]
+
+
 def create_field_input(label, key, col_obj, structured_data, optional=False):
     """Create input field with warning styling for empty fields"""
     value = structured_data.get(key, '')
     is_empty = is_field_empty(value)
     
-    # Format value based on type for display and editing
-    def format_value_for_input(val):
-        if val is None:
-            return ""
-        elif isinstance(val, (int, float)):
-            return str(val) if val >= 0 else ""
-        else:
-            return str(val) if val and val.lower() not in ['not mentioned', 'n/a', 'none', 'not specified'] else ""
-    
     input_value = format_value_for_input(value)
     
     # Create the input field
@@ -527,32 +712,32 @@ def create_field_input(label, key, col_obj, structured_data, optional=False):
         elif input_value and input_value.isdigit():
             default_value = int(input_value)
         
-        new_value = col_obj.number_input(
+        col_obj.number_input(
             label if not is_empty or optional else f"⚠️ {label}",
             value=default_value,
             min_value=0,
             key=f"field_{key}",
-            help="Enter a number"
+            help="Enter a number",
+            # Only user edits are written back to the structured data
+            on_change=sync_field_input,
+            args=(key,)
         )
-        # Update session state if value changed
-        if new_value != value:
-            if 'accumulated_structured_data' not in st.session_state:
-                st.session_state.accumulated_structured_data = {}
-            st.session_state.accumulated_structured_data[key] = new_value
     else:
         # Handle text fields
-        new_value = col_obj.text_area(
+        col_obj.text_area(
             label if not is_empty or optional else f"⚠️ {label}",
             value=input_value,
             height=100,
             key=f"field_{key}",
-            help="You can edit this field manually"
+            help="You can edit this field manually",
+            on_change=sync_field_input,
+            args=(key,)
         )
-        # Update session state if value changed
-        if new_value != input_value:
-            if 'accumulated_structured_data' not in st.session_state:
-                st.session_state.accumulated_structured_data = {}
-            st.session_state.accumulated_structured_data[key] = new_value
+
+
+def get_filled_fields(structured_data):
+    """Tuple of the schema fields that are filled in structured_data"""
+    return tuple(field for field in SALES_DATA_FIELDS if not is_field_empty(structured_data.get(field)))
 
 
 def render_data_completion_status(structured_data):
@@ -560,9 +745,8 @@ def render_data_completion_status(structured_data):
     if not structured_data:
         return
     
-    all_required_fields = SALES_DATA_SCHEMA.get("schema").get("properties").keys()
-    filled_count = sum(1 for field in all_required_fields if not is_field_empty(structured_data.get(field)))
-    total_fields = len(all_required_fields)
+    filled_count = len(get_filled_fields(structured_data))
+    total_fields = len(SALES_DATA_FIELDS)
     completion_percentage = (filled_count / total_fields) * 100 if total_fields > 0 else 0
     
     st.info(f"📊 Data Completion: {filled_count}/{total_fields} fields ({completion_percentage:.0f}%)")
@@ -620,6 +804,10 @@ def render_structured_data_form(structured_data, dev_mode=False):
 
         if st.session_state.get("accumulated_structured_data"):
             if st.button("Save notes to HubSpot"):
+                company_id = st.session_state.get("hubspot_company_id")
+                if not company_id:
+                    st.error("❌ Enter a HubSpot company ID before saving notes to HubSpot")
+                    return
                 data_to_send = {}
                 for key, value in st.session_state.accumulated_structured_data.items():
                     if key in SALES_DATA_SCHEMA_TO_COMPANY_HUBSPOT_FIELDS_MAPPING:
@@ -629,9 +817,10 @@ def render_structured_data_form(structured_data, dev_mode=False):
                         if key == 'mrr_start_date' and value:
                             try:
                                 # Convert DD/MM/YYYY to timestamp at midnight UTC for HubSpot
-                                date_obj = datetime.strptime(value, "%d/%m/%Y")
+                                day, month, year = value.split("/", 2)
+                                date_obj = date(int(year), int(month), int(day))
                                 # Create timezone-aware datetime at midnight UTC
-                                midnight_utc = datetime.combine(date_obj.date(), datetime.min.time(), timezone.utc)
+                                midnight_utc = datetime.combine(date_obj, datetime.min.time(), timezone.utc)
                                 timestamp_ms = int(midnight_utc.timestamp() * 1000)
                                 data_to_send[hubspot_field] = timestamp_ms
                             except ValueError:
@@ -639,51 +828,78 @@ def render_structured_data_form(structured_data, dev_mode=False):
                                 data_to_send[hubspot_field] = value
                         else:
                             data_to_send[hubspot_field] = value
-                try:
-                    # Send company data to HubSpot
-                    send_company_data_to_hubspot(st.session_state.hubspot_company_id, data_to_send)
-                    st.success("✅ Company data sent to HubSpot")
-                except Exception as e:
-                    st.error(f"❌ Error sending company data to HubSpot: {str(e)}")
-                try:
-                    if structured_data.get("project_manager_firstname") and structured_data.get("project_manager_lastname"):
-                        project_manager_data = {
-                            "firstname": structured_data.get("project_manager_firstname"),
-                            "lastname": structured_data.get("project_manager_lastname"),
-                            "hs_buying_role": "Project manager"
-                        }
-                        # Send contact data to HubSpot
-                        project_manager_hs_contact = create_contact_in_hubspot(project_manager_data)
-                        associate_contact_to_company(project_manager_hs_contact["id"], st.session_state.hubspot_company_id)
-                        st.success("✅ Project Manager data sent to HubSpot")
+                contacts = []
+                contact_labels = []
+                for label, field_prefix, buying_role in HUBSPOT_CONTACT_ROLES:
+                    firstname = structured_data.get(f"{field_prefix}_firstname")
+                    lastname = structured_data.get(f"{field_prefix}_lastname")
+                    if firstname and lastname:
+                        contacts.append({"firstname": firstname, "lastname": lastname, "hs_buying_role": buying_role})
+                        contact_labels.append(label)
                     else:
-                        st.warning("❌ Project Manager data not sent to HubSpot (Missing information)")
-                except Exception as e:
-                    st.error(f"❌ Error sending project manager data to HubSpot: {str(e)}")
-                try:
-                    if structured_data.get("decision_maker_firstname") and structured_data.get("decision_maker_lastname"):
-                        decision_maker_data = {
-                            "firstname": structured_data.get("decision_maker_firstname"),
-                            "lastname": structured_data.get("decision_maker_lastname"),
-                            "hs_buying_role": "DECISION_MAKER"
-                        }
-                        # Send contact data to HubSpot
-                        decision_maker_hs_contact = create_contact_in_hubspot(decision_maker_data)
-                        associate_contact_to_company(decision_maker_hs_contact["id"], st.session_state.hubspot_company_id)
-                        st.success("✅ Decision Maker data sent to HubSpot")
+                        st.warning(f"❌ {label} data not sent to HubSpot (Missing information)")
+                
+                # Contacts are not deduplicated by HubSpot, skip the ones already created for this company
+                synced_contacts = st.session_state.setdefault("synced_contact_hashes", set())
+                new_contacts = []
+                for label, contact in zip(contact_labels, contacts):
+                    contact_hash = hashlib.blake2b(json.dumps([contact, company_id], sort_keys=True).encode(), digest_size=16).hexdigest()
+                    if contact_hash in synced_contacts:
+                        st.info(f"ℹ️ {label} already sent to HubSpot")
                     else:
-                        st.warning("❌ Decision Maker data not sent to HubSpot (Missing information)")
+                        new_contacts.append((label, contact, contact_hash))
+                contact_labels = [label for label, _, _ in new_contacts]
+                contacts = [contact for _, contact, _ in new_contacts]
+                contact_hashes = [contact_hash for _, _, contact_hash in new_contacts]
+                # Marked before sending so a rerun during the request does not send them again
+                synced_contacts.update(contact_hashes)
+                
+                # The company update and the contact creation are independent, so both requests run concurrently.
+                # Only the HTTP calls run in the workers, results are reported from the script thread
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    # Send company data to HubSpot
+                    company_future = executor.submit(with_request_log(send_company_data_to_hubspot), company_id, data_to_send)
+                    # Send contact data to HubSpot, contacts are created and associated to the company in one request
+                    contacts_future = executor.submit(with_request_log(create_contacts_in_hubspot_batch), contacts, company_id) if contacts else None
+                try:
+                    company_future.result()
+                    st.success("✅ Company data sent to HubSpot")
                 except Exception as e:
-                    st.error(f"❌ Error sending decision maker data to HubSpot: {str(e)}")
-
+                    logger.exception("Company sync to HubSpot failed for company %s", company_id)
+                    st.error(f"❌ Error sending company data to HubSpot: {e}")
+                if contacts_future is not None:
+                    try:
+                        created_contacts, contact_errors = contacts_future.result()
+                        failed_labels = []
+                        for label, contact_hash, created_contact in zip(contact_labels, contact_hashes, created_contacts):
+                            if created_contact:
+                                st.success(f"✅ {label} data sent to HubSpot")
+                            else:
+                                # Only the rejected contacts can be retried
+                                synced_contacts.discard(contact_hash)
+                                failed_labels.append(label)
+                        if failed_labels:
+                            logger.error("Contacts sync to HubSpot partially failed for company %s: %s", company_id, contact_errors)
+                            st.error(f"❌ Error sending {' and '.join(failed_labels).lower()} data to HubSpot: {'; '.join(contact_errors)}")
+                    except Exception as e:
+                        # Allow retrying the same contacts
+                        synced_contacts.difference_update(contact_hashes)
+                        logger.exception("Contacts sync to HubSpot failed for company %s", company_id)
+                        st.error(f"❌ Error sending {' and '.join(contact_labels).lower()} data to HubSpot: {e}")
+
+@st.fragment
 def render_sales_notes_data_tab(dev_mode=False):
-    """Render the sales notes data tab"""
+    """Render the sales notes data tab, edits in the form only rerun this fragment"""
     st.subheader("📝 Sales Notes Data")
     
     structured_data = st.session_state.get('accumulated_structured_data', {})
     # Always render the form, even if data is empty (initialized)
     render_data_completion_status(structured_data)
     render_structured_data_form(structured_data, dev_mode)
+    
+    # The checklist is outside the fragment, rerun the whole app when a field got filled or emptied
+    if get_filled_fields(st.session_state.get('accumulated_structured_data', {})) != st.session_state.get('checklist_filled_fields'):
+        st.rerun()
 
 def get_human_readable_field_name(field_key):
     """Convert field keys to human-readable names"""
@@ -693,86 +909,100 @@ def render_checklist_section():
     """Render the checklist section with improved visual indicators"""
     with st.expander("📋 Field Completion Status", expanded=True):
         structured_data = st.session_state.get("accumulated_structured_data", {})
-        all_required_fields = SALES_DATA_SCHEMA.get("schema").get("properties").keys()
         
         # Calculate completion stats
+        filled_field_keys = get_filled_fields(structured_data)
+        st.session_state.checklist_filled_fields = filled_field_keys
+        if not filled_field_keys:
+            # Nothing recorded yet, a single message instead of listing every field as missing
+            st.session_state.completion_balloons_shown = False
+            st.info(f"📭 No fields filled yet ({len(SALES_DATA_FIELDS)} to go). Record notes to start filling them.")
+            return
         filled_fields = []
         empty_fields = []
         
-        for field in all_required_fields:
-            field_value = structured_data.get(field)
-            human_name = get_human_readable_field_name(field)
-            
-            if is_field_empty(field_value):
-                empty_fields.append(human_name)
-            else:
+        for field, human_name in SALES_DATA_FIELD_LABELS:
+            if field in filled_field_keys:
                 filled_fields.append(human_name)
+            else:
+                empty_fields.append(human_name)
         
-        total_fields = len(all_required_fields)
+        total_fields = len(SALES_DATA_FIELDS)
         completion_percentage = (len(filled_fields) / total_fields) * 100 if total_fields > 0 else 0
         
         # Progress bar
         st.progress(completion_percentage / 100, text=f"Completion: {len(filled_fields)}/{total_fields} fields ({completion_percentage:.0f}%)")
         
-        # Show filled fields
+        # Show filled and empty fields, one element per list (styled by the field-status classes of style.css)
         if filled_fields:
-            st.markdown("#### ✅ **Completed Fields**")
-            for field_name in filled_fields:
-                st.success(f"✅ {field_name}")
+            filled_items = "".join(f'<div class="field-status-completed">✅ {field_name}</div>' for field_name in filled_fields)
+            st.markdown(f"#### ✅ **Completed Fields**\n\n{filled_items}", unsafe_allow_html=True)
         
-        # Show empty fields
         if empty_fields:
-            st.markdown("#### ⚠️ **Missing Fields**")
-            for field_name in empty_fields:
-                st.error(f"❌ {field_name}")
+            empty_items = "".join(f'<div class="field-status-missing">❌ {field_name}</div>' for field_name in empty_fields)
+            st.markdown(f"#### ⚠️ **Missing Fields**\n\n{empty_items}", unsafe_allow_html=True)
         
-        # Show completion message when all done
+        # Show completion message when all done, balloons only when the last field gets filled
         if len(filled_fields) == total_fields:
-            st.balloons()
+            if not st.session_state.get('completion_balloons_shown'):
+                st.balloons()
+                st.session_state.completion_balloons_shown = True
             st.success("🎉 All fields completed! Ready to save to HubSpot.")
+        else:
+            st.session_state.completion_balloons_shown = False
+
+def save_edited_summary():
+    """Store the summary edited in the summary editor"""
+    st.session_state.accumulated_summary = st.session_state.summary_editor
 
+@st.fragment
 def render_transcript_summary_tab():
-    """Render the transcript and summary tab"""
+    """Render the transcript and summary tab, summary edits only rerun this fragment"""
     # Display all accumulated transcripts
     if hasattr(st.session_state, 'accumulated_transcripts') and st.session_state.accumulated_transcripts:
         if len(st.session_state.accumulated_transcripts) > 1:
-            with st.expander("View all transcripts", expanded=False):
+            # A toggle rather than an expander, collapsed expanders still build every text area on each rerun
+            if st.toggle("View all transcripts", key="show_all_transcripts"):
                 for i, transcript in enumerate(st.session_state.accumulated_transcripts, 1):
                     st.text_area(f"Transcript {i}:", value=transcript, height=100, disabled=True, key=f"transcript_{i}")
     
     # Summary text input section
     st.subheader("📋 Accumulated Summary")
     summary_value = st.session_state.get('accumulated_summary', '')
-    new_summary = st.text_area(
+    # Edits are stored by save_edited_summary, so the editor only differs when a recording or Start Over changed the summary
+    if st.session_state.get('summary_editor') != summary_value:
+        st.session_state.summary_editor = summary_value
+    st.text_area(
         "Edit or review the accumulated summary:",
-        value=summary_value,
         height=200,
         placeholder="The AI-generated summary will appear here after processing audio...",
         key="summary_editor",
-        help="You can edit this summary manually"
+        help="You can edit this summary manually",
+        on_change=save_edited_summary
     )
-    
-    # Update session state if summary changed
-    if new_summary != summary_value:
-        st.session_state.accumulated_summary = new_summary
 
 
 def render_data_display_tabs(dev_mode=False):
     """Render the data display tabs (Sales Notes Data and Transcript & Summary)"""
-    sales_notes_data_tab, transcript_summary_tab = st.tabs(["📝 Sales Notes Data", "📄 Transcript & Summary"])
+    # A radio instead of st.tabs so that only the selected tab is built, st.tabs runs every tab on each rerun
+    selected_tab = st.radio(
+        "View",
+        ["📝 Sales Notes Data", "📄 Transcript & Summary"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="data_display_tab"
+    )
     
-    with sales_notes_data_tab:
+    if selected_tab == "📝 Sales Notes Data":
         render_sales_notes_data_tab(dev_mode)
-    
-    with transcript_summary_tab:
+    else:
         render_transcript_summary_tab()
 
 
 def post_sales_recap_app(dev_mode=False, hs_id=None):
     """Main application function - orchestrates all components"""
     # Initialize empty structured data if not already present
-    if 'accumulated_structured_data' not in st.session_state:
-        st.session_state.accumulated_structured_data = initialize_empty_structured_data()
+    st.session_state.setdefault('accumulated_structured_data', initialize_empty_structured_data())
     
     # Render header and get HubSpot ID
     render_app_header(hs_id)
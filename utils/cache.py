@@ -0,0 +1,70 @@
+import os
+import glob
+import json
+import hashlib
+from datetime import datetime
+
+# Last successful API responses, served when the upstream service is unreachable
+FALLBACK_CACHE_DIR = ".cache"
+
+def _fallback_cache_path(name, key):
+    key_hash = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(FALLBACK_CACHE_DIR, f"{name}-{key_hash}.json")
+
+def save_fallback(name, key, data, max_age=None):
+    """
+    Persist the latest successful result for name/key, errors are only logged
+    
+    Args:
+        name: Cache name, the prefix of the cache files
+        key: JSON serializable key of the result
+        data: JSON serializable result
+        max_age: When set (a timedelta), other name results older than max_age are deleted
+    """
+    try:
+        os.makedirs(FALLBACK_CACHE_DIR, exist_ok=True)
+        path = _fallback_cache_path(name, key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": datetime.now().isoformat(), "data": data}, f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Could not write fallback cache for {name}: {str(e)}")
+    if max_age is not None:
+        prune_cache(name, max_age)
+
+def prune_cache(name, max_age):
+    """Delete the name results saved more than max_age (a timedelta) ago, they would never be read again"""
+    oldest_timestamp = (datetime.now() - max_age).timestamp()
+    for path in glob.glob(os.path.join(FALLBACK_CACHE_DIR, f"{glob.escape(name)}-*.json")):
+        try:
+            if os.path.getmtime(path) < oldest_timestamp:
+                os.remove(path)
+        except OSError:
+            pass
+
+def load_fallback(name, key):
+    """Return (data, saved_at) of the last successful result for name/key, or None"""
+    try:
+        with open(_fallback_cache_path(name, key), "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return cached["data"], cached["saved_at"]
+    except (OSError, KeyError, ValueError):
+        return None
+
+def clear_fallback(name, key):
+    """Remove the result saved for name/key, once the upstream data is known to have changed"""
+    try:
+        os.remove(_fallback_cache_path(name, key))
+    except OSError:
+        pass
+
+def load_cached(name, key, max_age):
+    """Return the data saved for name/key if it is younger than max_age (a timedelta), or None"""
+    cached = load_fallback(name, key)
+    if cached is None:
+        return None
+    data, saved_at = cached
+    if datetime.now() - datetime.fromisoformat(saved_at) > max_age:
+        return None
+    return data
@@ -1,4 +1,4 @@
-import datetime
+from datetime import datetime
 
 def format_date(date_string):
     """Format date string for display"""
@@ -0,0 +1,91 @@
+import requests
+import threading
+import streamlit as st
+from collections import deque
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from urllib3.util.retry import Retry
+
+# Rate limiting and gateway errors are worth retrying, other errors are returned as is
+RETRY_STATUSES = [429, 502, 503, 504]
+
+# Number of requests kept in the request log of each session
+REQUEST_LOG_MAX_ENTRIES = 100
+
+# Request log of the session a worker thread is sending requests for, see with_request_log
+_worker_request_log = threading.local()
+
+def get_request_log():
+    """
+    Latest requests of the current session, oldest first
+    
+    Returns:
+        deque of (method, URL without query string, status, milliseconds) tuples kept in
+        st.session_state, None outside of a script run
+    """
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.setdefault("api_request_log", deque(maxlen=REQUEST_LOG_MAX_ENTRIES))
+
+def with_request_log(fn):
+    """
+    Wrap fn for a worker thread, the requests it sends are recorded in the calling session's log
+    
+    Must be called from the script thread, the worker threads have no access to st.session_state
+    """
+    request_log = get_request_log()
+    def run_with_request_log(*args, **kwargs):
+        previous_log = getattr(_worker_request_log, "log", None)
+        _worker_request_log.log = request_log
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _worker_request_log.log = previous_log
+    return run_with_request_log
+
+def _record_request(response, *args, **kwargs):
+    """Response hook keeping the request timing in the session's request log, retries included"""
+    request_log = getattr(_worker_request_log, "log", None)
+    if request_log is None:
+        request_log = get_request_log()
+    if request_log is None:
+        return
+    request_log.append((
+        response.request.method,
+        # Query strings can hold API tokens
+        response.request.url.split("?", 1)[0],
+        response.status_code,
+        round(response.elapsed.total_seconds() * 1000)
+    ))
+
+def create_retrying_session(extra_retry_methods=(), pool_connections=8, pool_maxsize=16):
+    """
+    Create a requests.Session that reuses connections and retries failed requests
+
+    Requests answered with a RETRY_STATUSES code are retried up to 3 times with exponential
+    backoff, waiting for the Retry-After header when the API sends one. The last response
+    is returned rather than raised, so callers keep their own status handling.
+    Every response is recorded in the request log of the session sending it, see get_request_log.
+
+    Args:
+        extra_retry_methods: HTTP methods retried on top of the idempotent ones (GET, PUT, DELETE...)
+        pool_connections: Number of hosts kept in the connection pool
+        pool_maxsize: Number of connections kept per host
+
+    Returns:
+        Configured requests.Session for https:// URLs
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | set(extra_retry_methods),
+            raise_on_status=False
+        )
+    ))
+    session.hooks["response"].append(_record_request)
+    return session
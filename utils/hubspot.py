@@ -1,102 +1,124 @@
 import requests
 import streamlit as st
+from utils.cache import save_fallback, load_fallback
+from utils.http import create_retrying_session
 
+# Shared by all HubSpot calls so connections are reused, with retries on rate limiting (429) and gateway errors.
+# POST is not retried since a batch create that timed out at the gateway may still have created the contacts
+HUBSPOT_SESSION = create_retrying_session(extra_retry_methods={"PATCH"})
+# Sent with every request, JSON bodies get their Content-Type from requests
+HUBSPOT_SESSION.headers["Authorization"] = f"Bearer {st.secrets['HUBSPOT_API_KEY']}"
+
+# Error responses can be large, only this much of the body is kept in raised errors
+HUBSPOT_ERROR_BODY_MAX_CHARS = 500
+
+# Cache for 5 minutes, the header reads it on every rerun. Error responses raise so they are not cached
+@st.cache_data(ttl=300, show_spinner=False)
 def get_hubspot_company_data(hubspot_id):
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{hubspot_id}"
-    headers = {
-        "Authorization": f"Bearer {st.secrets['HUBSPOT_API_KEY']}"
-    }
-    response = requests.get(url, headers=headers, timeout=30)
-    return response.json()
+    fallback_key = {"hubspot_id": hubspot_id}
+    try:
+        response = HUBSPOT_SESSION.get(url, timeout=30)
+    except requests.exceptions.RequestException:
+        # Show the last company data fetched if HubSpot can't be reached
+        fallback = load_fallback("hubspot_company", fallback_key)
+        if fallback is None:
+            raise
+        company_data, saved_at = fallback
+        st.warning(f"⚠️ HubSpot unreachable - showing company data saved on {saved_at[:16].replace('T', ' ')}")
+        return company_data
+    if response.status_code < 200 or response.status_code >= 300:
+        raise Exception(f"HubSpot API error: {response.status_code} - {response.text[:HUBSPOT_ERROR_BODY_MAX_CHARS]}")
+    company_data = response.json()
+    save_fallback("hubspot_company", fallback_key, company_data)
+    return company_data
 
 def _sanitize_data(data):
     """Sanitize data by converting empty values to None"""
-    sanitized = {}
-    for key, value in data.items():
-        if not value:
-            sanitized[key] = None
-        else:
-            sanitized[key] = value
-    return sanitized
+    return {key: value if value else None for key, value in data.items()}
 
 def send_company_data_to_hubspot(hubspot_id, data):
     print(f"📝 Sending company data to HubSpot: {data}")
     url = f"https://api.hubapi.com/crm/v3/objects/companies/{hubspot_id}"
-    headers = {
-        "Authorization": f"Bearer {st.secrets['HUBSPOT_API_KEY']}",
-        "Content-Type": "application/json"
-    }
     try:
         # HubSpot v3 API expects properties to be wrapped in a "properties" object
         payload = {"properties": _sanitize_data(data)}
-        response = requests.patch(url, headers=headers, json=payload, timeout=30)
+        response = HUBSPOT_SESSION.patch(url, json=payload, timeout=30)
         
         if response.status_code >=200 and response.status_code < 300:
             return response.json()
         else:
-            raise Exception(f"HubSpot API error: {response.status_code} - {response.text}")
+            raise Exception(f"HubSpot API error: {response.status_code} - {response.text[:HUBSPOT_ERROR_BODY_MAX_CHARS]}")
     except Exception as e:
         raise Exception(f"Error in send_company_data_to_hubspot: {str(e)}")
 
-def create_contact_in_hubspot(data):
-    print(f"📝 Creating contact in HubSpot: {data}")
-    url = f"https://api.hubapi.com/crm/v3/objects/contacts"
-    headers = {
-        "Authorization": f"Bearer {st.secrets['HUBSPOT_API_KEY']}",
-        "Content-Type": "application/json"
-    }
+def create_contacts_in_hubspot_batch(contacts, company_id):
+    """
+    Create up to 100 contacts associated to the company in a single batch request
+    
+    Returns:
+        Tuple of (created, errors) where created holds, in the order of contacts, the created
+        HubSpot contact or None when HubSpot rejected it, and errors the HubSpot error messages.
+        Raises when the request fails as a whole
+    """
+    print(f"📝 Creating {len(contacts)} contacts for company {company_id} in HubSpot: {contacts}")
+    url = f"https://api.hubapi.com/crm/v3/objects/contacts/batch/create"
     try:
-        # HubSpot v3 API expects properties to be wrapped in a "properties" object
-        payload = {"properties": _sanitize_data(data)}
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        # Each contact carries its company association, so no separate association calls are needed
+        payload = {
+            "inputs": [
+                {
+                    # Echoed back in the results and errors, tells which contacts were created
+                    "objectWriteTraceId": str(index),
+                    "properties": _sanitize_data(contact),
+                    "associations": [
+                        {
+                            "to": {"id": company_id},
+                            "types": [{"associationCategory": "HUBSPOT_DEFINED", "associationTypeId": 1}]
+                        }
+                    ]
+                }
+                for index, contact in enumerate(contacts)
+            ]
+        }
+        response = HUBSPOT_SESSION.post(url, json=payload, timeout=30)
         
+        # 207 means some contacts were created and others failed
         if response.status_code >=200 and response.status_code < 300:
-            return response.json()
-        else:
-            raise Exception(f"HubSpot API error: {response.status_code} - {response.text}")
-    except Exception as e:
-        raise Exception(f"Error in create_contact_in_hubspot: {str(e)}")
-
-def associate_contact_to_company(contact_id, company_id):
-    print(f"📝 Associating contact to company in HubSpot: {contact_id} to {company_id}")
-    url = f"https://api.hubapi.com/crm/v4/objects/contacts/{contact_id}/associations/companies/{company_id}"
-    headers = {
-        "Authorization": f"Bearer {st.secrets['HUBSPOT_API_KEY']}",
-        "Content-Type": "application/json"
-    }
-    try:
-        # HubSpot v4 API requires a request body with association type
-        request_body = [
-            {
-                "associationCategory": "HUBSPOT_DEFINED",
-                "associationTypeId": 1
-            }
-        ]
-        response = requests.put(url, headers=headers, json=request_body, timeout=30)
-        
-        if response.status_code >=200 and response.status_code < 300:
-            return response.json()
+            data = response.json()
+            created = [None] * len(contacts)
+            for result in data.get("results", []):
+                created[int(result["objectWriteTraceId"])] = result
+            errors = [error.get("message", str(error)) for error in data.get("errors", [])]
+            if not any(created):
+                raise Exception(f"HubSpot API error: {response.status_code} - {'; '.join(errors)[:HUBSPOT_ERROR_BODY_MAX_CHARS]}")
+            return created, errors
         else:
-            raise Exception(f"HubSpot API error: {response.status_code} - {response.text}")
+            raise Exception(f"HubSpot API error: {response.status_code} - {response.text[:HUBSPOT_ERROR_BODY_MAX_CHARS]}")
     except Exception as e:
-        raise Exception(f"Error in associate_contact_to_company: {str(e)}")
+        raise Exception(f"Error in create_contacts_in_hubspot_batch: {str(e)}")
 
 def get_tms_list_for_field():
     url = f"https://api.hubapi.com/crm/v3/properties/companies/tms"
-    headers = {
-        "Authorization": f"Bearer {st.secrets['HUBSPOT_API_KEY']}"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=30)
+        response = HUBSPOT_SESSION.get(url, timeout=30)
         
         if response.status_code >=200 and response.status_code < 300:
             data = response.json()
             if "options" in data and data["options"]:
-                return [option["value"] for option in data["options"]]
+                options = [option["value"] for option in data["options"]]
+                save_fallback("hubspot_tms_options", {}, options)
+                return options
             else:
                 print(f"⚠️ No options found in TMS field response: {data}")
                 return []
         else:
-            raise Exception(f"HubSpot API error: {response.status_code} - {response.text}")
+            raise Exception(f"HubSpot API error: {response.status_code} - {response.text[:HUBSPOT_ERROR_BODY_MAX_CHARS]}")
     except Exception as e:
-        raise Exception(f"Error in get_tms_list_for_field: {str(e)}")
+        # The TMS options rarely change, the last fetched ones are good enough when HubSpot is down
+        fallback = load_fallback("hubspot_tms_options", {})
+        if fallback is None:
+            raise Exception(f"Error in get_tms_list_for_field: {str(e)}")
+        options, saved_at = fallback
+        print(f"⚠️ Could not fetch TMS options ({str(e)}), using the ones saved on {saved_at[:16].replace('T', ' ')}")
+        return options
@@ -1,6 +1,39 @@
 import requests
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
+from utils.cache import save_fallback, load_fallback
+from utils.http import create_retrying_session, with_request_log
+
+# Retries rate limited (429) and gateway error responses, the stats query is a read-only POST
+PLAUSIBLE_SESSION = create_retrying_session(extra_retry_methods={"POST"})
+
+# Maximum number of result pages requested at the same time
+PLAUSIBLE_MAX_CONCURRENT_PAGES = 4
+
+
+def _format_page_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Extract the page rows of a Plausible query response
+    
+    Args:
+        data: Parsed JSON response of the Stats API query
+    
+    Returns:
+        List of dictionaries with the page path, visitors and pageviews
+    """
+    page_results = []
+    for result in data.get("results", []):
+        metrics = result.get("metrics", [])
+        dimensions = result.get("dimensions", [])
+        
+        if len(metrics) >= 2 and len(dimensions) >= 1:
+            page_results.append({
+                "page": dimensions[0],  # event:page dimension
+                "visitors": metrics[0],  # visitors metric
+                "pageviews": metrics[1]  # pageviews metric
+            })
+    return page_results
 
 
 @st.cache_data(ttl=300)
@@ -29,7 +62,7 @@ def get_page_visits_custom_date_range(
         
     Raises:
         ValueError: If API key is missing, dates are invalid, or response processing fails
-        ConnectionError: If API request fails
+        ConnectionError: If API request fails and no previously saved result exists
     """
     
     # Get API key from Streamlit secrets if not provided
@@ -51,67 +84,66 @@ def get_page_visits_custom_date_range(
         "Content-Type": "application/json"
     }
     
-    # Collect all results across multiple pages
-    all_results = []
-    offset = 0
+    # Key for the last-known-good copy served if Plausible is unreachable
+    fallback_key = {"site_id": site_id, "start_date": start_date, "end_date": end_date, "limit": limit}
+    
+    # Query payload for custom date range, the pagination is set per request
+    base_payload = {
+        "site_id": site_id,
+        "metrics": ["visitors", "pageviews"],
+        "date_range": [start_date, end_date],
+        "dimensions": ["event:page"],
+        "order_by": [["pageviews", "desc"]]
+    }
+    
+    def query_page(offset, current_page_size, include_total_rows=False):
+        query_payload = {**base_payload, "pagination": {"limit": current_page_size, "offset": offset}}
+        if include_total_rows:
+            query_payload["include"] = {"total_rows": True}
+        response = PLAUSIBLE_SESSION.post(url, headers=headers, json=query_payload, timeout=30)
+        response.raise_for_status()
+        return response.json()
     
     try:
-        while len(all_results) < limit:
-            # Calculate how many results to fetch in this request
-            remaining_limit = limit - len(all_results)
-            current_page_size = min(page_size, remaining_limit)
-            
-            # Query payload for custom date range
-            query_payload = {
-                "site_id": site_id,
-                "metrics": ["visitors", "pageviews"],
-                "date_range": [start_date, end_date],
-                "dimensions": ["event:page"],
-                "order_by": [["pageviews", "desc"]],
-                "pagination": {
-                    "limit": current_page_size,
-                    "offset": offset
-                }
-            }
-            
-            # Make the API request
-            response = requests.post(url, headers=headers, json=query_payload, timeout=30)
-            response.raise_for_status()
-            
-            # Parse the response
-            data = response.json()
-            
-            # Extract results and format them
-            page_results = []
-            for result in data.get("results", []):
-                metrics = result.get("metrics", [])
-                dimensions = result.get("dimensions", [])
-                
-                if len(metrics) >= 2 and len(dimensions) >= 1:
-                    page_data = {
-                        "page": dimensions[0],  # event:page dimension
-                        "visitors": metrics[0],  # visitors metric
-                        "pageviews": metrics[1]  # pageviews metric
-                    }
-                    page_results.append(page_data)
-            
-            # If no more results, break the loop
-            if not page_results:
-                break
+        # The first page also reports the total number of rows, so the other pages are known upfront
+        first_page_size = min(page_size, limit)
+        data = query_page(0, first_page_size, include_total_rows=True)
+        all_results = _format_page_results(data)
+        total_rows = data.get("meta", {}).get("total_rows")
+        
+        if len(all_results) == first_page_size and total_rows is not None:
+            # Remaining pages are fetched concurrently, results are kept in page order so the pageviews order holds
+            offsets = range(first_page_size, min(limit, total_rows), page_size)
+            with ThreadPoolExecutor(max_workers=PLAUSIBLE_MAX_CONCURRENT_PAGES) as executor:
+                pages = executor.map(with_request_log(lambda offset: query_page(offset, min(page_size, limit - offset))), offsets)
+                for page_data in pages:
+                    all_results.extend(_format_page_results(page_data))
+        elif len(all_results) == first_page_size:
+            # No total rows count, walk the pages until a short one comes back
+            offset = first_page_size
+            while len(all_results) < limit:
+                # Calculate how many results to fetch in this request
+                current_page_size = min(page_size, limit - len(all_results))
+                page_results = _format_page_results(query_page(offset, current_page_size))
+                all_results.extend(page_results)
                 
-            all_results.extend(page_results)
-            
-            # If we got fewer results than requested, we've reached the end
-            if len(page_results) < current_page_size:
-                break
+                # If we got fewer results than requested, we've reached the end
+                if len(page_results) < current_page_size:
+                    break
                 
-            # Move to next page
-            offset += current_page_size
+                # Move to next page
+                offset += current_page_size
         print( "Found", len(all_results), "results")
+        save_fallback("analytics", fallback_key, all_results)
         return all_results
         
     except requests.exceptions.RequestException as e:
-        raise ConnectionError(f"Failed to query Plausible API: {str(e)}") from e
+        fallback = load_fallback("analytics", fallback_key)
+        if fallback is None:
+            raise ConnectionError(f"Failed to query Plausible API: {str(e)}") from e
+        stale_results, saved_at = fallback
+        st.warning(f"⚠️ Plausible API unreachable, showing analytics saved on {saved_at[:16].replace('T', ' ')}")
+        return stale_results
     except (KeyError, IndexError, ValueError) as e:
         raise ValueError(f"Error processing Plausible API response: {str(e)}") from e
 
@@ -1,6 +1,10 @@
 import streamlit as st
 import requests
 import uuid
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import save_fallback, load_fallback, load_cached, clear_fallback
+from utils.http import create_retrying_session, with_request_log
 # Get API key from secrets
 try:
     api_key = st.secrets["STORYBLOK_API_KEY"]
@@ -19,83 +23,144 @@ HEADERS = {
     "Content-Type": "application/json"
 }
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+# Shared by all Storyblok calls, retries rate limited (429) and gateway error responses
+STORYBLOK_SESSION = create_retrying_session()
+STORYBLOK_SESSION.headers.update(HEADERS)
+
+# Stories saved by the last fetch are reused for this long, so a server restart does not refetch every page.
+# They are saved under their own cache name, the "stories" outage copy is never cleared
+STORIES_DISK_CACHE_MAX_AGE = timedelta(minutes=5)
+
+# Maximum number of story pages requested at the same time
+STORYBLOK_MAX_CONCURRENT_PAGES = 4
+# Maximum number of stories updated at the same time, kept low for the Management API rate limit
+STORYBLOK_MAX_CONCURRENT_UPDATES = 4
+
+def _fetch_stories_page(params):
+    """Fetch a single page of stories from the Management API"""
+    response = STORYBLOK_SESSION.get(STORYBLOK_API_BASE, params=params, timeout=30)
+    response.raise_for_status()
+    return response
+
+def _fetch_cdn_stories_page(params):
+    """Fetch a single page of stories from the CDN API"""
+    response = STORYBLOK_SESSION.get(STORYBLOK_API_BASE_CDN, params=params, timeout=30)
+    response.raise_for_status()
+    return response
+
+def _fallback_stories(test, error_message):
+    """Serve the last successfully fetched stories when Storyblok can't be reached"""
+    fallback = load_fallback("stories", {"test": test})
+    if fallback is None:
+        st.error(error_message)
+        return []
+    stories, saved_at = fallback
+    st.warning(f"⚠️ {error_message} - showing stories saved on {saved_at[:16].replace('T', ' ')}")
+    return stories
+
+# Cache for 5 minutes, st.cache_resource hands out the list itself instead of unpickling a copy
+# on every rerun, callers must not modify the stories
+@st.cache_resource(ttl=300)
 def fetch_all_stories(test=False):
     """Fetch all stories from Storyblok"""
-    all_stories = []
-    page = 1
+    cached_stories = load_cached("stories_recent", {"test": test}, STORIES_DISK_CACHE_MAX_AGE)
+    if cached_stories is not None:
+        return cached_stories
+    
     per_page = 100
+    max_pages = 100
+    params = {
+        "per_page": per_page,
+        "story_only": True
+    }
     
     with st.spinner("🔄 Loading stories from Storyblok..."):
-        while True:
-            try:
-                # Fetch stories with pagination
-                params = {
-                    "per_page": per_page,
-                    "page": page,
-                    "story_only": True
-                }
-                
-                
-                response = requests.get(STORYBLOK_API_BASE, params=params, headers=HEADERS, timeout=30)
-                response.raise_for_status()
-                
-                data = response.json()
-                stories = data.get("stories", [])
-                
-                if not stories:
-                    break
-                    
-                all_stories.extend(stories)
-                page += 1
-                
-                if page > 100 or test: 
-                    break
-                
-            except requests.exceptions.RequestException as e:
-                st.error(f"❌ Error fetching stories: {str(e)}")
-                return []
-            except (ValueError, KeyError) as e:
-                st.error(f"❌ Error parsing response: {str(e)}")
-                return []
+        try:
+            response = _fetch_stories_page({**params, "page": 1})
+            all_stories = response.json().get("stories", [])
+            if not all_stories or test:
+                return all_stories
+            
+            total = response.headers.get("Total")
+            if total is not None:
+                # Storyblok sends the total story count, so the remaining pages are known upfront
+                # and can be fetched concurrently
+                last_page = min(max_pages, -(-int(total) // per_page))
+                with ThreadPoolExecutor(max_workers=STORYBLOK_MAX_CONCURRENT_PAGES) as executor:
+                    responses = executor.map(
+                        with_request_log(lambda page: _fetch_stories_page({**params, "page": page})),
+                        range(2, last_page + 1)
+                    )
+                    for page_response in responses:
+                        all_stories.extend(page_response.json().get("stories", []))
+            else:
+                # No total header, walk the pages until an empty one comes back
+                for page in range(2, max_pages + 1):
+                    stories = _fetch_stories_page({**params, "page": page}).json().get("stories", [])
+                    if not stories:
+                        break
+                    all_stories.extend(stories)
+            
+        except requests.exceptions.RequestException as e:
+            return _fallback_stories(test, f"❌ Error fetching stories: {str(e)}")
+        except (ValueError, KeyError) as e:
+            return _fallback_stories(test, f"❌ Error parsing response: {str(e)}")
     
+    save_fallback("stories", {"test": test}, all_stories)
+    save_fallback("stories_recent", {"test": test}, all_stories)
     return all_stories
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+@st.cache_resource(ttl=300)  # Cache for 5 minutes, shared like fetch_all_stories
 def fetch_all_stories_cdn(test=False):
     """Fetch all stories from Storyblok CDN"""
-    all_stories = []
-    page = 1
     per_page = 100
+    max_pages = 100
+    params = {
+        "per_page": per_page,
+        "token": cdn_api_key
+    }
     with st.spinner("🔄 Loading stories from Storyblok CDN..."):
-        while True:
-            try:
-                params = {
-                    "per_page": per_page,
-                    "page": page,
-                    "token": cdn_api_key
-                }
-                response = requests.get(STORYBLOK_API_BASE_CDN, params=params, headers=HEADERS, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                stories = data.get("stories", [])
-                if not stories:
-                    break
-                all_stories.extend(stories)
-                page += 1
-                if page > 100 or test:
-                    break
-            except requests.exceptions.RequestException as e:
-                st.error(f"❌ Error fetching stories: {str(e)}")
-                return []
+        try:
+            response = _fetch_cdn_stories_page({**params, "page": 1})
+            all_stories = response.json().get("stories", [])
+            if not all_stories or test:
+                return all_stories
+            
+            total = response.headers.get("Total")
+            if total is not None:
+                # Same as fetch_all_stories, the remaining pages are fetched concurrently
+                last_page = min(max_pages, -(-int(total) // per_page))
+                with ThreadPoolExecutor(max_workers=STORYBLOK_MAX_CONCURRENT_PAGES) as executor:
+                    responses = executor.map(
+                        with_request_log(lambda page: _fetch_cdn_stories_page({**params, "page": page})),
+                        range(2, last_page + 1)
+                    )
+                    for page_response in responses:
+                        all_stories.extend(page_response.json().get("stories", []))
+            else:
+                for page in range(2, max_pages + 1):
+                    stories = _fetch_cdn_stories_page({**params, "page": page}).json().get("stories", [])
+                    if not stories:
+                        break
+                    all_stories.extend(stories)
+        except requests.exceptions.RequestException as e:
+            st.error(f"❌ Error fetching stories: {str(e)}")
+            return []
     return all_stories
 
 def change_page_group_id(page_id, group_id):
-    """Change the group_id of a page"""
+    """
+    Change the group_id of a page
+    
+    Only does HTTP calls so it can run in a worker thread, errors are returned for the caller to show
+    
+    Returns:
+        None on success, the error message otherwise
+    """
     try:
         # First, get the current story data
         get_url = f"{STORYBLOK_API_BASE}{page_id}"
-        response = requests.get(get_url, headers=HEADERS, timeout=30)
+        response = STORYBLOK_SESSION.get(get_url, timeout=30)
         response.raise_for_status()
         
         story_data = response.json().get('story', {})
@@ -105,16 +170,14 @@ def change_page_group_id(page_id, group_id):
         
         # Update the story via PUT request
         put_url = f"{STORYBLOK_API_BASE}{page_id}"
-        update_response = requests.put(put_url, headers=HEADERS, json={'story': story_data}, timeout=30)
+        update_response = STORYBLOK_SESSION.put(put_url, json={'story': story_data}, timeout=30)
         update_response.raise_for_status()
         
-        return True
+        return None
     except requests.exceptions.RequestException as e:
-        st.error(f"❌ Error updating page {page_id}: {str(e)}")
-        return False
+        return f"❌ Error updating page {page_id}: {str(e)}"
     except (ValueError, KeyError) as e:
-        st.error(f"❌ Error parsing response for page {page_id}: {str(e)}")
-        return False
+        return f"❌ Error parsing response for page {page_id}: {str(e)}"
 
 def group_pages(page_ids):
     """Group pages by their group_id"""
@@ -122,18 +185,31 @@ def group_pages(page_ids):
         st.error("❌ No page IDs provided for grouping")
         return None
         
+    # A page selected twice is only updated once
+    page_ids = list(dict.fromkeys(page_ids))
     group_id = str(uuid.uuid4())
     st.write(f"🔄 Grouping {len(page_ids)} pages with group_id: {group_id}")
     
     success_count = 0
     failed_pages = []
     
-    for page_id in page_ids:
-        st.write(f"📝 Updating page_id: {page_id}...")
-        if change_page_group_id(page_id, group_id):
-            success_count += 1
-        else:
-            failed_pages.append(page_id)
+    # Each page is a GET then a PUT, pages are updated concurrently.
+    # Only the HTTP calls run in the workers, results are reported from the script thread
+    with ThreadPoolExecutor(max_workers=STORYBLOK_MAX_CONCURRENT_UPDATES) as executor:
+        errors = executor.map(with_request_log(lambda page_id: change_page_group_id(page_id, group_id)), page_ids)
+        for page_id, error in zip(page_ids, errors):
+            if error is None:
+                st.write(f"📝 Updated page_id: {page_id}")
+                success_count += 1
+            else:
+                st.error(error)
+                failed_pages.append(page_id)
+    
+    if success_count:
+        # The recent stories no longer match Storyblok, the next fetch must not reuse them.
+        # The outage copy is kept, it is overwritten by the next successful fetch
+        for test in (False, True):
+            clear_fallback("stories_recent", {"test": test})
     
     if success_count == len(page_ids):
         st.success(f"✅ Successfully grouped all {success_count} pages!")